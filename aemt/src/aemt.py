@@ -14,6 +14,7 @@ import split
 import cartridge
 import config
 import atr
+import atx
 
 # Constants
 
@@ -36,6 +37,9 @@ def aemt():
 
             \b
                 Manipulates Atari 8-bit .ATR disk images.                        
+
+            \b
+                Inspects and validates Atari 8-bit .ATX disk images.
             
             \b
                 Moves files to organized folder structures, with an optionally
@@ -61,4 +65,5 @@ if __name__ == '__main__':
     aemt.add_command(cartridge.cart)
     aemt.add_command(config.config)
     aemt.add_command(atr.atr)
+    aemt.add_command(atx.atx)
     aemt()
\ No newline at end of file
@@ -7,10 +7,23 @@
 # License: https://github.com/idunmore/AtariTools/blob/master/LICENSE
 
 # Native Python Modules
+import json
+import mmap
+import os
 import pathlib
+import struct
+import zlib
+from contextlib import nullcontext
+from typing import BinaryIO, Iterator, Self
 
 # 3rd Party/External Modules
 import click
+import numpy
+
+# Local Application Modules
+import dcm
+import dos2
+import fileops
 
 # Constants
 
@@ -22,14 +35,343 @@ SUCCESS = 0
 # Status Messages
 PROTECT_SUCCESS = 'Write-protected.'
 UNPROTECT_SUCCESS = 'Write-protection disabled.'
+PROTECTED_TOTAL = 'Write-protected:'
+UNPROTECTED_TOTAL = 'not write-protected:'
 
 # .ATR File Constants
 ATR_PATTERN = '*.atr'
-ATR_PATTERN_RECR = '**/*.atr'
+DCM_PATTERN = '*.dcm'
+XFD_PATTERN = '*.xfd'
+RECURSE_PATTERN_PREFIX = '**/'
 STATUS_BYTE_INDEX = 0x0F
 PROTECT_BIT_MASK = 0x01
 UNPROTECT_BIT_MASK = 0xFE
 
+# .ATR Header Constants
+ATR_HEADER_SIZE = 16
+ATR_MAGIC = 0x0296
+PARAGRAPH_SIZE = 16
+PARAGRAPHS_LOW_MASK = 0xFFFF
+PARAGRAPHS_HIGH_SHIFT = 16
+BOOT_SECTOR_COUNT = 3
+BOOT_SECTOR_SIZE = 128
+VALID_SECTOR_SIZES = (128, 256, 512)
+
+# Header layout (little-endian): magic, paragraphs (low word), sector size,
+# paragraphs (high byte), CRC, four unused bytes and the flags (status) byte.
+ATR_HEADER_FORMAT = struct.Struct('<HHHBI4xB')
+
+# Image Builder Constants
+ATR_SUFFIX = '.atr'
+XFD_SUFFIX = '.xfd'
+ALL_FILES_PATTERN = '*'
+ALL_FILES_PATTERN_RECR = '**/*'
+# Hidden files and folders (e.g. macOS .DS_Store and ._* AppleDouble files)
+# are never built into images.
+HIDDEN_PREFIX = '.'
+BUILT = 'Built'
+CREATED = 'Created'
+CONVERTED = 'Converted'
+
+# Standard Geometries: (sector size, sector count)
+DENSITY_SINGLE = 'single'
+DENSITY_ENHANCED = 'enhanced'
+DENSITY_DOUBLE = 'double'
+DENSITY_GEOMETRIES = {DENSITY_SINGLE: (128, 720),
+                      DENSITY_ENHANCED: (128, 1040),
+                      DENSITY_DOUBLE: (256, 720)}
+
+# .XFD (raw sector dump) sizes that are double density; others are taken to
+# be single/enhanced density (128-byte sectors).
+XFD_DOUBLE_DENSITY_SIZES = (183936, 184320)
+XFD_DOUBLE_SECTOR_SIZE = 256
+XFD_SINGLE_SECTOR_SIZE = 128
+
+# Sector Delta Constants: the delta is a header (signature, version, the
+# target image's header, CRC-32s of the source and target sector data and the
+# number of records) then, for each changed sector, its number and data.
+DELTA_SIGNATURE = b'ATRD'
+DELTA_VERSION = 1
+DELTA_HEADER_FORMAT = struct.Struct(f'<4sB{ATR_HEADER_SIZE}sIII')
+DELTA_SECTOR_FORMAT = struct.Struct('<I')
+CHANGED_SECTORS = 'changed sectors'
+PATCHED = 'Patched'
+
+# Trim Constants
+DEFAULT_MANIFEST = 'atr-trim.jsonl'
+TRIMMED = 'Trimmed'
+TO_TRIM = 'Would trim'
+EXPANDED = 'Expanded'
+NOTHING_TO_TRIM = 'No unused trailing sectors'
+
+# Directory Listing Constants
+CSV_SEPARATOR = ','
+CSV_QUOTE = '"'
+PATH_SEPARATOR = '/'
+LOCKED_MARKER = '*'
+DIRECTORY_MARKER = ':'
+LISTING_INDENT = '  '
+FREE_SECTORS_TEXT = 'FREE SECTORS'
+
+# Extraction Constants
+UNSAFE_FILENAME_CHARACTERS = '/\\\0'
+SAFE_FILENAME_CHARACTER = '_'
+TARGET_EXISTS = 'Target exists; use -o/--overwrite to replace it'
+DUPLICATE_TARGET = 'Built from more than one source'
+EXTRACTED = 'Extracted'
+
+# .ATR Error Messages
+INVALID_HEADER_SIZE = 'Invalid .atr header size; expected'
+INVALID_SECTOR_NUMBER = 'Invalid sector number'
+INVALID_MAGIC = 'Invalid signature (magic number)'
+INVALID_SECTOR_SIZE = 'Invalid sector size'
+INVALID_IMAGE_SIZE = 'Header size does not match file size'
+INVALID_GEOMETRY = 'Sector data is not a whole number of sectors'
+INVALID_SECTOR_COUNT = 'Invalid sector count'
+GEOMETRY_MISMATCH = 'Image does not match its manifest entry'
+DIFFERENT_LAYOUTS = 'Images have different sector sizes or layouts'
+INVALID_DELTA = 'Not an .atr sector delta'
+SOURCE_MISMATCH = 'Source image does not match the delta'
+TARGET_MISMATCH = 'Patched image does not match the delta'
+REASON_SEPARATOR = '; '
+MAX_SECTOR_COUNT = 65535
+
+# Verification Output Formats
+FORMAT_JSONL = 'jsonl'
+FORMAT_CSV = 'csv'
+
+class AtrHeader:
+    '''.ATR disk image header, parsed once.'''
+    __slots__ = ('_magic', '_paragraphs', '_sector_size', '_crc', '_flags')
+
+    def __init__(self: Self, bytes: bytes):
+        if len(bytes) < ATR_HEADER_SIZE:
+            raise ValueError(f'{INVALID_HEADER_SIZE}: {ATR_HEADER_SIZE} '
+                             f'bytes, got: {len(bytes)}')
+        (self._magic, paragraphs_low, self._sector_size, paragraphs_high,
+         self._crc, self._flags) = ATR_HEADER_FORMAT.unpack_from(bytes)
+        self._paragraphs = (
+            paragraphs_low | (paragraphs_high << PARAGRAPHS_HIGH_SHIFT))
+
+    @classmethod
+    def build(cls, sector_size: int, sector_count: int,
+              flags: int = 0) -> Self:
+        '''Builds a header for an image with the given geometry.'''
+        return cls.for_data_size(
+            sector_size, image_data_size(sector_size, sector_count), flags)
+
+    @classmethod
+    def for_data_size(cls, sector_size: int, data_size: int,
+                      flags: int = 0) -> Self:
+        '''Builds a header for data_size bytes of sector data; e.g. from a
+        raw sector dump, which may have full-size boot sectors.'''
+        paragraphs = data_size // PARAGRAPH_SIZE
+        return cls(ATR_HEADER_FORMAT.pack(
+            ATR_MAGIC, paragraphs & PARAGRAPHS_LOW_MASK, sector_size,
+            paragraphs >> PARAGRAPHS_HIGH_SHIFT, 0, flags))
+
+    def with_data_size(self: Self, data_size: int) -> Self:
+        '''A copy of the header, for data_size bytes of sector data.'''
+        paragraphs = data_size // PARAGRAPH_SIZE
+        return AtrHeader(ATR_HEADER_FORMAT.pack(
+            self._magic, paragraphs & PARAGRAPHS_LOW_MASK, self._sector_size,
+            paragraphs >> PARAGRAPHS_HIGH_SHIFT, self._crc, self._flags))
+
+    def to_bytes(self: Self) -> bytes:
+        return ATR_HEADER_FORMAT.pack(
+            self._magic, self._paragraphs & PARAGRAPHS_LOW_MASK,
+            self._sector_size, self._paragraphs >> PARAGRAPHS_HIGH_SHIFT,
+            self._crc, self._flags)
+
+    @property
+    def magic(self: Self) -> int:
+        return self._magic
+
+    @property
+    def paragraphs(self: Self) -> int:
+        '''Size of the sector data, in 16-byte paragraphs.'''
+        return self._paragraphs
+
+    @property
+    def sector_size(self: Self) -> int:
+        return self._sector_size
+
+    @property
+    def crc(self: Self) -> int:
+        return self._crc
+
+    @property
+    def flags(self: Self) -> int:
+        return self._flags
+
+    @property
+    def data_size(self: Self) -> int:
+        '''Size of the sector data (the image, less its header), in bytes.'''
+        return self._paragraphs * PARAGRAPH_SIZE
+
+    @property
+    def write_protected(self: Self) -> bool:
+        return (self._flags & PROTECT_BIT_MASK) != 0
+
+    @property
+    def short_boot_sectors(self: Self) -> bool:
+        '''True if the first three sectors are stored as 128 bytes, in an
+        image with larger sectors; otherwise they're padded to full size.'''
+        return (self._sector_size > BOOT_SECTOR_SIZE and
+                self.data_size % self._sector_size ==
+                (BOOT_SECTOR_COUNT * BOOT_SECTOR_SIZE) % self._sector_size)
+
+    @property
+    def sector_count(self: Self) -> int:
+        return self.sectors_in(self.data_size)
+
+    def sectors_in(self: Self, data_size: int) -> int:
+        '''Number of whole sectors, in this image's layout, in data_size
+        bytes of sector data.'''
+        if self._sector_size not in VALID_SECTOR_SIZES:
+            return 0
+        if self.short_boot_sectors:
+            boot_size = BOOT_SECTOR_COUNT * BOOT_SECTOR_SIZE
+            if data_size < boot_size:
+                return data_size // BOOT_SECTOR_SIZE
+            return (BOOT_SECTOR_COUNT +
+                    (data_size - boot_size) // self._sector_size)
+        return data_size // self._sector_size
+
+    def problems(self: Self, file_size: int) -> list:
+        '''Structural problems with the header, for an image file of
+        file_size bytes; an empty list if there are none.'''
+        problems = []
+        if self._magic != ATR_MAGIC:
+            problems.append(INVALID_MAGIC)
+        if self._sector_size not in VALID_SECTOR_SIZES:
+            problems.append(f'{INVALID_SECTOR_SIZE}: {self._sector_size}')
+        if ATR_HEADER_SIZE + self.data_size != file_size:
+            problems.append(f'{INVALID_IMAGE_SIZE}: expected '
+                            f'{ATR_HEADER_SIZE + self.data_size}, '
+                            f'got: {file_size}')
+        if self._sector_size in VALID_SECTOR_SIZES:
+            sector_count = self.sector_count
+            sectors_size = (image_data_size(self._sector_size, sector_count)
+                            if self.short_boot_sectors
+                            else sector_count * self._sector_size)
+            if sectors_size != self.data_size:
+                problems.append(INVALID_GEOMETRY)
+            if sector_count < 1 or sector_count > MAX_SECTOR_COUNT:
+                problems.append(f'{INVALID_SECTOR_COUNT}: {sector_count}')
+        return problems
+
+    def sector_offset(self: Self, number: int) -> int:
+        '''Offset, in the image file, of a (1-based) sector number.'''
+        if number < 1 or number > self.sector_count:
+            raise IndexError(f'{INVALID_SECTOR_NUMBER}: {number}')
+        if self.short_boot_sectors:
+            if number <= BOOT_SECTOR_COUNT:
+                return ATR_HEADER_SIZE + (number - 1) * BOOT_SECTOR_SIZE
+            return (ATR_HEADER_SIZE + BOOT_SECTOR_COUNT * BOOT_SECTOR_SIZE +
+                    (number - 1 - BOOT_SECTOR_COUNT) * self._sector_size)
+        return ATR_HEADER_SIZE + (number - 1) * self._sector_size
+
+    def sector_length(self: Self, number: int) -> int:
+        '''Usable length of a sector; the boot sectors are always 128.'''
+        return (BOOT_SECTOR_SIZE if number <= BOOT_SECTOR_COUNT
+                else self._sector_size)
+
+class AtrImage:
+    '''A memory-mapped .ATR disk image, with its sectors exposed as zero-copy
+    (memoryview) slices of the mapping; nothing is read until it's used.
+
+    Use as a context manager; views obtained from the image must not be kept
+    beyond its "with" block.
+    '''
+    def __init__(self: Self, file: pathlib.Path, writable: bool = False):
+        self._file = open(file, 'r+b' if writable else 'rb')
+        try:
+            self._mmap = mmap.mmap(
+                self._file.fileno(), 0,
+                access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            self._file.close()
+            raise ValueError(f'{INVALID_HEADER_SIZE}: {ATR_HEADER_SIZE} '
+                             f'bytes, got: 0')
+        self._view = memoryview(self._mmap)
+        try:
+            self._header = AtrHeader(self._view[:ATR_HEADER_SIZE])
+        except ValueError:
+            self.close()
+            raise
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args):
+        self.close()
+
+    def close(self: Self):
+        if self._file.closed:
+            return
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    @property
+    def header(self: Self) -> AtrHeader:
+        return self._header
+
+    @property
+    def sector_size(self: Self) -> int:
+        return self._header.sector_size
+
+    @property
+    def sector_count(self: Self) -> int:
+        '''Number of sectors, per the header, that are present in the file.'''
+        return min(self._header.sector_count,
+                   self._header.sectors_in(len(self._mmap) - ATR_HEADER_SIZE))
+
+    @property
+    def write_protected(self: Self) -> bool:
+        return self._header.write_protected
+
+    @write_protected.setter
+    def write_protected(self: Self, protect: bool):
+        self._view[STATUS_BYTE_INDEX] = set_protect_bit(
+            self._view[STATUS_BYTE_INDEX:STATUS_BYTE_INDEX + 1], protect)[0]
+        self._header = AtrHeader(self._view[:ATR_HEADER_SIZE])
+
+    @property
+    def data(self: Self) -> memoryview:
+        '''A view of the sector data (the image, less its header), as far as
+        the header and file size agree.'''
+        return self._view[ATR_HEADER_SIZE:
+                          ATR_HEADER_SIZE + min(self._header.data_size,
+                                                len(self._mmap) -
+                                                ATR_HEADER_SIZE)]
+
+    def sector(self: Self, number: int) -> memoryview:
+        '''Returns a view of a (1-based) sector's data.'''
+        offset = self._header.sector_offset(number)
+        length = self._header.sector_length(number)
+        if offset + length > len(self._mmap):
+            raise IndexError(f'{INVALID_SECTOR_NUMBER}: {number}')
+        return self._view[offset:offset + length]
+
+    def sectors(self: Self) -> Iterator[memoryview]:
+        '''Yields each sector, lazily; each view is released when the next
+        one is requested.'''
+        for number in range(1, self.sector_count + 1):
+            with self.sector(number) as sector:
+                yield sector
+
+def image_data_size(sector_size: int, sector_count: int) -> int:
+    '''Size of the sector data, in bytes, for an image's geometry; the first
+    three sectors of larger-sector images are stored as 128 bytes.'''
+    if sector_size > BOOT_SECTOR_SIZE:
+        boot_sectors = min(sector_count, BOOT_SECTOR_COUNT)
+        return (boot_sectors * BOOT_SECTOR_SIZE +
+                (sector_count - boot_sectors) * sector_size)
+    return sector_count * sector_size
+
 @click.group()
 @click.version_option('0.0.1.1')
 def atr():
@@ -80,33 +422,497 @@ def status(recurse: bool, source_path: str):
     
     SOURCE_PATH may be a directory or a file; if a directory *only* .atr files
     will be processed.  The -r/--recurse option will include subdirectories.
+
+    Each file's status is reported as soon as it's found (in the order the
+    file system returns them), followed by the totals.
+    '''
+    protected = unprotected = failures = 0
+    for file in find_source_files(source_path, recurse):
+        try:
+            is_protected = get_file_protection_status(file)
+        except (OSError, ValueError) as error:
+            click.echo(f'{ERROR_TEXT}{file}: {error}')
+            failures += 1
+            continue
+
+        if is_protected:
+            protected += 1
+        else:
+            unprotected += 1
+        status_text = PROTECT_SUCCESS if is_protected else UNPROTECT_SUCCESS
+        click.echo(f'{file}: {status_text}')
+
+    if not (protected or unprotected or failures):
+        click.echo(ERROR_TEXT + 'No .atr files found to process.')
+        exit(ERROR)
+
+    click.echo(f'{PROTECTED_TOTAL} {protected}, '
+               f'{UNPROTECTED_TOTAL} {unprotected}')
+    exit(ERROR if failures else SUCCESS)
+
+@atr.command('dir')
+@click.option('-c', '--csv', is_flag=True, default=False,
+    help='Output in CSV format')
+@click.option('-h', '--header', is_flag=True, default=False,
+    help='Output a header if in CSV format')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .atr files')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def dir(csv: bool, header: bool, recurse: bool, source_path: str):
+    '''List the files on Atari DOS 2.x / MyDOS .ATR disk images.
+    
+    SOURCE_PATH may be a directory or a file; if a directory *only* .atr files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    Only the VTOC and directory sectors of each image are read.
+    '''
+    files = build_source_file_list(source_path, recurse)
+
+    if not files:
+        click.echo(ERROR_TEXT + 'No .atr files found to process.')
+        exit(ERROR)
+
+    if csv and header:
+        click.echo('Image,File,Sectors,Locked,Directory')
+
+    failures = 0
+    for file in files:
+        if not list_directory(file, csv):
+            failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+@atr.command('extract')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing files')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .atr files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+@click.argument('dest_path', 
+    type=click.Path(exists=True, file_okay=False, dir_okay=True))
+def extract(overwrite: bool, recurse: bool, verbose: bool, source_path: str,
+            dest_path: str):
+    '''Extract the files from Atari DOS 2.x / MyDOS .ATR disk images.
+    
+    SOURCE_PATH may be a directory or a file; if a directory *only* .atr files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    The files from each image are written to a folder, named for the image,
+    in DEST_PATH (following the same structure as SOURCE_PATH); MyDOS
+    sub-directories become sub-folders.
     '''
     files = build_source_file_list(source_path, recurse)
 
     if not files:
         click.echo(ERROR_TEXT + 'No .atr files found to process.')
         exit(ERROR)
+
+    failures = 0
+    for file in files:
+        target_path = get_target_path(file, pathlib.Path(source_path),
+                                      pathlib.Path(dest_path)).with_suffix('')
+        if not extract_files(file, target_path, overwrite, verbose):
+            failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+@atr.command('verify')
+@click.option('-f', '--format', 'output_format', default=FORMAT_JSONL,
+    show_default=True, type=click.Choice([FORMAT_JSONL, FORMAT_CSV]),
+    help='Output format')
+@click.option('-h', '--header', is_flag=True, default=False,
+    help='Output a header if in CSV format')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .atr files')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def verify(output_format: str, header: bool, recurse: bool, source_path: str):
+    '''Verify the structure of .ATR disk images, from their headers.
     
+    SOURCE_PATH may be a directory or a file; if a directory *only* .atr files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    Checks the signature, sector size, that the header's size matches the
+    file's size and that the image holds a whole number of sectors; only
+    the 16-byte header of each image is read.
+    '''
+    files = build_source_file_list(source_path, recurse)
+
+    if not files:
+        click.echo(ERROR_TEXT + 'No .atr files found to process.')
+        exit(ERROR)
+
+    if output_format == FORMAT_CSV and header:
+        click.echo('Valid,Sector Size,Sector Count,File Size,Reasons,File')
+
+    invalid = 0
     for file in files:
-        is_protected = get_file_protection_status(file)
-        status_text = PROTECT_SUCCESS if is_protected else UNPROTECT_SUCCESS
-        click.echo(f'{file}: {status_text}')
-        exit(SUCCESS)
+        result = verify_file(file)
+        if not result['valid']:
+            invalid += 1
+        echo_verify_result(result, output_format)
 
-def build_source_file_list(source_path: str, recurse: bool) -> list:
+    exit(ERROR if invalid else SUCCESS)
+
+@atr.command('build')
+@click.option('-a', '--add', 'add_files', multiple=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    help='A file to add to every image, before the others (e.g. DOS.SYS); '
+         'may be repeated')
+@click.option('-b', '--boot', 'boot_file',
+    type=click.File('rb'),
+    help='A 384-byte file with the boot sectors (1-3) for every image')
+@click.option('-d', '--density', default=DENSITY_SINGLE, show_default=True,
+    type=click.Choice([DENSITY_SINGLE, DENSITY_DOUBLE]),
+    help='Density of the images (DOS 2.0S or 2.0D)')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing images')
+@click.option('-p', '--per-file', is_flag=True, default=False,
+    help='Build one image per file, rather than one per folder')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+@click.argument('dest_path', 
+    type=click.Path(exists=True, file_okay=False, dir_okay=True))
+def build(add_files: tuple, boot_file, density: str, overwrite: bool,
+          per_file: bool, recurse: bool, verbose: bool, source_path: str,
+          dest_path: str):
+    '''Build Atari DOS 2.0 formatted .ATR disk images from host files.
+    
+    By default the files in SOURCE_PATH become one image, named for the
+    folder, in DEST_PATH; with -r/--recurse each subdirectory also becomes
+    an image.  With -p/--per-file each file becomes an image of its own.
+    Images follow the same structure, in DEST_PATH, as SOURCE_PATH.
+
+    \b
+    Host file names are mapped to DOS 8.3 names.  No DOS is included; to
+    make bootable images add the boot sectors (-b/--boot) and DOS files
+    (-a/--add) from an existing DOS 2.0 disk.
+    '''
+    source_path = pathlib.Path(source_path)
+    dest_path = pathlib.Path(dest_path)
+    boot_sectors = boot_file.read() if boot_file else None
+    extra_files = [pathlib.Path(file) for file in add_files]
+
+    images = build_image_list(source_path, dest_path, per_file, recurse)
+    if not images:
+        click.echo(ERROR_TEXT + 'No files found to process.')
+        exit(ERROR)
+
+    # Sources that map to the same image would overwrite each other, so
+    # nothing is built if any do.
+    duplicates = find_duplicate_targets(images, per_file)
+    if duplicates:
+        for target, sources in duplicates.items():
+            click.echo(f'{ERROR_TEXT}{target}: {DUPLICATE_TARGET}: '
+                       f'{", ".join(str(source) for source in sources)}')
+        exit(ERROR)
+
+    failures = 0
+    for target, files in images:
+        if not build_image(target, extra_files + files,
+                           DENSITY_GEOMETRIES[density][0], boot_sectors,
+                           overwrite):
+            failures += 1
+        elif verbose:
+            click.echo(f'{target}: {BUILT}')
+
+    exit(ERROR if failures else SUCCESS)
+
+@atr.command('create')
+@click.option('-d', '--density', default=DENSITY_SINGLE, show_default=True,
+    type=click.Choice(list(DENSITY_GEOMETRIES)),
+    help='Standard geometry of the images')
+@click.option('-s', '--sectors', type=click.IntRange(1, MAX_SECTOR_COUNT),
+    help='Number of sectors, overriding the density (e.g. MyDOS/SpartaDOS)')
+@click.option('-z', '--sector-size', type=click.Choice(
+    [str(size) for size in VALID_SECTOR_SIZES]),
+    help='Sector size, overriding the density')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing images')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('dest_path', nargs=-1, required=True,
+    type=click.Path(file_okay=True, dir_okay=False))
+def create(density: str, sectors: int, sector_size: str, overwrite: bool,
+           verbose: bool, dest_path: tuple):
+    '''Create blank (unformatted) .ATR disk images.
+
+    \b
+    Each DEST_PATH is created with the given geometry; only the 16-byte
+    header is written, the sectors are allocated sparsely (so they take no
+    disk space until they're written).
+    '''
+    default_size, default_count = DENSITY_GEOMETRIES[density]
+    sector_size = int(sector_size) if sector_size else default_size
+    sector_count = sectors if sectors else default_count
+
+    failures = 0
+    for file in dest_path:
+        if not create_blank_image(pathlib.Path(file), sector_size,
+                                  sector_count, overwrite):
+            failures += 1
+        elif verbose:
+            click.echo(f'{file}: {CREATED}')
+
+    exit(ERROR if failures else SUCCESS)
+
+@atr.command('from-dcm')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing images')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .dcm files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+@click.argument('dest_path', 
+    type=click.Path(exists=True, file_okay=False, dir_okay=True))
+def from_dcm(overwrite: bool, recurse: bool, verbose: bool, source_path: str,
+             dest_path: str):
+    '''Convert DiskComm (.DCM) compressed disk images to .ATR images.
+    
+    SOURCE_PATH may be a directory or a file; if a directory *only* .dcm files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    Images are written to DEST_PATH, following the same structure as
+    SOURCE_PATH.  Each image is decoded as a stream, a sector at a time, and
+    sectors that aren't stored in it are left sparse.
+    '''
+    exit(convert_files(source_path, dest_path, recurse, DCM_PATTERN,
+                       ATR_SUFFIX, verbose,
+                       lambda file, target: convert_dcm(file, target,
+                                                        overwrite)))
+
+@atr.command('from-xfd')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing images')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .xfd files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.option('-z', '--sector-size', type=click.Choice(
+    [str(size) for size in VALID_SECTOR_SIZES]),
+    help='Sector size, rather than guessing it from the file size')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+@click.argument('dest_path', 
+    type=click.Path(exists=True, file_okay=False, dir_okay=True))
+def from_xfd(overwrite: bool, recurse: bool, verbose: bool, sector_size: str,
+             source_path: str, dest_path: str):
+    '''Convert raw (.XFD) disk images to .ATR images, by adding a header.
+    
+    SOURCE_PATH may be a directory or a file; if a directory *only* .xfd files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    Images are written to DEST_PATH, following the same structure as
+    SOURCE_PATH; the sector data is copied by the operating system.  Images
+    of 183,936 or 184,320 bytes are taken to be double density.
+    '''
+    exit(convert_files(source_path, dest_path, recurse, XFD_PATTERN,
+                       ATR_SUFFIX, verbose,
+                       lambda file, target: xfd_to_atr(
+                           file, target, overwrite,
+                           int(sector_size) if sector_size else None)))
+
+@atr.command('to-xfd')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing images')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .atr files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+@click.argument('dest_path', 
+    type=click.Path(exists=True, file_okay=False, dir_okay=True))
+def to_xfd(overwrite: bool, recurse: bool, verbose: bool, source_path: str,
+           dest_path: str):
+    '''Convert .ATR disk images to raw (.XFD) images, by removing the header.
+    
+    SOURCE_PATH may be a directory or a file; if a directory *only* .atr files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    Images are written to DEST_PATH, following the same structure as
+    SOURCE_PATH; the sector data is copied by the operating system.
+    '''
+    exit(convert_files(source_path, dest_path, recurse, ATR_PATTERN,
+                       XFD_SUFFIX, verbose,
+                       lambda file, target: atr_to_xfd(file, target,
+                                                       overwrite)))
+
+@atr.command('diff')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite an existing delta')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='List the changed sectors')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=False))
+@click.argument('target_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=False))
+@click.argument('delta_path', 
+    type=click.Path(file_okay=True, dir_okay=False))
+def diff(overwrite: bool, verbose: bool, source_path: str, target_path: str,
+         delta_path: str):
+    '''Write the sectors that differ between two .ATR images to a delta.
+    
+    \b
+    DELTA_PATH is created holding only the sectors of TARGET_PATH that differ
+    from SOURCE_PATH (or that it adds); "atr patch" rebuilds TARGET_PATH from
+    SOURCE_PATH and the delta.  Both images must have the same sector size.
+    '''
+    try:
+        with AtrImage(source_path) as source, AtrImage(target_path) as target:
+            changed = get_changed_sectors(source, target)
+            write_delta(source, target, changed, pathlib.Path(delta_path),
+                        overwrite)
+    except FileExistsError:
+        click.echo(f'{ERROR_TEXT}{delta_path}: {TARGET_EXISTS}')
+        exit(ERROR)
+    except (ValueError, IndexError) as error:
+        click.echo(f'{ERROR_TEXT}{error}')
+        exit(ERROR)
+
+    click.echo(f'{delta_path}: {len(changed)} {CHANGED_SECTORS}')
+    if verbose and changed:
+        click.echo(' '.join(str(number) for number in changed))
+    exit(SUCCESS)
+
+@atr.command('patch')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite an existing target image')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=False))
+@click.argument('delta_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=False))
+@click.argument('target_path', 
+    type=click.Path(file_okay=True, dir_okay=False))
+def patch(overwrite: bool, source_path: str, delta_path: str,
+          target_path: str):
+    '''Apply a sector delta, from "atr diff", to an .ATR image.
+    
+    \b
+    TARGET_PATH is created from SOURCE_PATH with the delta's sectors written
+    over it.  The source, and the result, are checked against the CRC-32s
+    in the delta.
+    '''
+    target_path = pathlib.Path(target_path)
+    try:
+        if not apply_delta(pathlib.Path(source_path),
+                           pathlib.Path(delta_path), target_path, overwrite):
+            exit(ERROR)
+    except (ValueError, IndexError) as error:
+        click.echo(f'{ERROR_TEXT}{error}')
+        exit(ERROR)
+
+    click.echo(f'{target_path}: {PATCHED}')
+    exit(SUCCESS)
+
+@atr.command('trim')
+@click.option('-m', '--manifest', default=DEFAULT_MANIFEST, show_default=True,
+    type=click.Path(file_okay=True, dir_okay=False),
+    help='Manifest to append the original geometries to')
+@click.option('-n', '--dry-run', is_flag=True, default=False,
+    help='Report what would be trimmed, without writing anything')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .atr files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def trim(manifest: str, dry_run: bool, recurse: bool, verbose: bool,
+         source_path: str):
+    '''Trim unused trailing sectors from DOS 2.x / MyDOS .ATR disk images.
+
+    \b
+    SOURCE_PATH may be a directory or a file; if a directory *only* .atr files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    \b
+    Sectors after the last one the VTOC shows as in use, that are also empty
+    (all zero), are removed; only the header's size is rewritten, then the
+    file is truncated.  Each image's original geometry is appended to the
+    manifest (as JSON lines), so "atr expand" can restore it.
+    '''
+    files = build_source_file_list(source_path, recurse)
+    if not files:
+        click.echo(ERROR_TEXT + 'No .atr files found to process.')
+        exit(ERROR)
+
+    trimmed = 0
+    freed = 0
+    failures = 0
+    # A dry run writes nothing, including the manifest
+    with (nullcontext() if dry_run
+          else open(manifest, 'a')) as manifest_file:
+        for file in files:
+            result = trim_image(file, dry_run, verbose)
+            if result is None:
+                failures += 1
+            elif result:
+                trimmed += 1
+                freed += result['file_size'] - result['trimmed_file_size']
+                if not dry_run:
+                    manifest_file.write(json.dumps(result) + '\n')
+                    manifest_file.flush()
+
+    action = TO_TRIM if dry_run else TRIMMED
+    click.echo(f'{action} {trimmed} of {len(files)} image(s); '
+               f'{freed} byte(s) freed.')
+    exit(ERROR if failures else SUCCESS)
+
+@atr.command('expand')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('manifest', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=False))
+def expand(verbose: bool, manifest: str):
+    '''Restore .ATR images trimmed by "atr trim" to their original size.
+
+    \b
+    Each image in MANIFEST has its header's size restored, and is extended
+    (sparsely, with empty sectors) to its original size.
+    '''
+    expanded = 0
+    failures = 0
+    with open(manifest) as manifest_file:
+        for line in manifest_file:
+            if not line.strip():
+                continue
+            if expand_image(json.loads(line), verbose):
+                expanded += 1
+            else:
+                failures += 1
+
+    click.echo(f'{EXPANDED} {expanded} image(s).')
+    exit(ERROR if failures else SUCCESS)
+
+def build_source_file_list(source_path: str, recurse: bool,
+                           pattern: str = ATR_PATTERN) -> list:
     # We can work on a single file, or a directory (with optional recursion),
     # so build a list of file(s) accordingly
+    files = list(find_source_files(source_path, recurse, pattern))
+    files.sort(key=lambda x: x.name.lower())
+    return files
+
+def find_source_files(source_path: str, recurse: bool,
+                      pattern: str = ATR_PATTERN) -> Iterator[pathlib.Path]:
+    '''Yields the file, or the files in the directory (with optional
+    recursion), as they're found.'''
     source_path = pathlib.Path(source_path)
-    files = None
     if source_path.is_file():
-        files = []
-        files.append(source_path)
+        yield source_path
     elif source_path.is_dir():
-        pattern = ATR_PATTERN_RECR if recurse else ATR_PATTERN      
-        files = list(source_path.glob(pattern))
-        files.sort(key=lambda x: x.name.lower())
-            
-    return files
+        if recurse:
+            pattern = RECURSE_PATTERN_PREFIX + pattern
+        yield from source_path.glob(pattern)
 
 def process_atr_files(
     source_path: str, recurse: bool, verbose: bool, protect: bool) -> int:
@@ -125,30 +931,547 @@ def process_atr_files(
 
     return SUCCESS
 
+def list_directory(file: pathlib.Path, csv: bool) -> bool:
+    try:
+        with AtrImage(file) as image:
+            file_system = dos2.Dos2FileSystem(image)
+            if not csv:
+                click.echo(f'{file}:')
+            for path, entry in file_system.walk():
+                echo_directory_entry(file, path, entry, csv)
+            if not csv:
+                click.echo(f'{LISTING_INDENT}{file_system.free_sectors:03} '
+                           f'{FREE_SECTORS_TEXT}')
+    except (ValueError, IndexError) as error:
+        click.echo(f'{ERROR_TEXT}{file}: {error}')
+        return False
+
+    return True
+
+def echo_directory_entry(file: pathlib.Path, path: tuple,
+                         entry: dos2.DirectoryEntry, csv: bool):
+    if csv:
+        name = PATH_SEPARATOR.join(path + (entry.filename,))
+        click.echo(f'{CSV_QUOTE}{file}{CSV_QUOTE}{CSV_SEPARATOR}'
+                   f'{CSV_QUOTE}{name}{CSV_QUOTE}{CSV_SEPARATOR}'
+                   f'{entry.sector_count}{CSV_SEPARATOR}{entry.is_locked}'
+                   f'{CSV_SEPARATOR}{entry.is_subdirectory}')
+        return
+
+    # DOS 2.x style: "* NAME     EXT 123", with MyDOS sub-directories shown
+    # as ":NAME" and their contents indented.
+    locked = LOCKED_MARKER if entry.is_locked else ' '
+    directory = DIRECTORY_MARKER if entry.is_subdirectory else ' '
+    click.echo(f'{LISTING_INDENT * (len(path) + 1)}{locked}{directory}'
+               f'{entry.name:{dos2.NAME_LENGTH}} '
+               f'{entry.extension:{dos2.EXTENSION_LENGTH}} '
+               f'{entry.sector_count:03}')
+
+def get_target_path(file: pathlib.Path, source_path: pathlib.Path,
+                    dest_path: pathlib.Path) -> pathlib.Path:
+    '''Maps a file found under source_path to the same place in dest_path.'''
+    if source_path.is_dir():
+        return dest_path / file.relative_to(source_path)
+    return dest_path / file.name
+
+def extract_files(file: pathlib.Path, target_path: pathlib.Path,
+                  overwrite: bool, verbose: bool) -> bool:
+    success = True
+    try:
+        with AtrImage(file) as image:
+            file_system = dos2.Dos2FileSystem(image)
+            for path, entry in file_system.walk():
+                if entry.is_subdirectory:
+                    continue
+                folder = target_path.joinpath(
+                    *(get_safe_filename(name) for name in path))
+                target = folder / get_safe_filename(entry.filename)
+                folder.mkdir(parents=True, exist_ok=True)
+                if not extract_file(file_system, entry, target, overwrite):
+                    success = False
+                elif verbose:
+                    click.echo(f'{file}: {EXTRACTED} {target}')
+    except (ValueError, IndexError) as error:
+        click.echo(f'{ERROR_TEXT}{file}: {error}')
+        return False
+
+    return success
+
+def extract_file(file_system: dos2.Dos2FileSystem, entry: dos2.DirectoryEntry,
+                 target: pathlib.Path, overwrite: bool) -> bool:
+    '''Streams a file's data, sector by sector, to the target file.'''
+    try:
+        target_fd = fileops.create_file(target, overwrite)
+    except FileExistsError:
+        click.echo(f'{ERROR_TEXT}{target}: {TARGET_EXISTS}')
+        return False
+
+    try:
+        for data in file_system.file_data(entry):
+            fileops.write_all(target_fd, data)
+    finally:
+        os.close(target_fd)
+    return True
+
+def get_safe_filename(name: str) -> str:
+    '''Replaces characters that can't be used in host file names.'''
+    for character in UNSAFE_FILENAME_CHARACTERS:
+        name = name.replace(character, SAFE_FILENAME_CHARACTER)
+    return name
+
+def build_image_list(source_path: pathlib.Path, dest_path: pathlib.Path,
+                     per_file: bool, recurse: bool) -> list:
+    '''Lists the images to build, as (target image, [host files]) pairs.'''
+    if source_path.is_file():
+        return [(dest_path / source_path.with_suffix(ATR_SUFFIX).name,
+                 [source_path])]
+
+    pattern = ALL_FILES_PATTERN_RECR if recurse else ALL_FILES_PATTERN
+    files = [file for file in source_path.glob(pattern)
+             if file.is_file() and not is_hidden(file, source_path)]
+    files.sort(key=lambda x: str(x).lower())
+    if per_file:
+        return [(get_target_path(file, source_path, dest_path).with_suffix(
+                    ATR_SUFFIX), [file]) for file in files]
+
+    # One image per folder; the source folder's image is named for it
+    folders = {}
+    for file in files:
+        folders.setdefault(file.parent, []).append(file)
+    images = []
+    for folder, folder_files in folders.items():
+        target = (dest_path / source_path.name if folder == source_path
+                  else get_target_path(folder, source_path, dest_path))
+        images.append((target.with_name(target.name + ATR_SUFFIX),
+                       folder_files))
+    return images
+
+def is_hidden(file: pathlib.Path, source_path: pathlib.Path) -> bool:
+    # The file, or any folder it's in below the source folder
+    return any(part.startswith(HIDDEN_PREFIX)
+               for part in file.relative_to(source_path).parts)
+
+def find_duplicate_targets(images: list, per_file: bool) -> dict:
+    '''Returns {target image: [sources]} for targets with more than one
+    source (a file, or a folder); names are compared ignoring case, as they
+    are on FAT formatted media.'''
+    sources = {}
+    for target, files in images:
+        source = files[0] if per_file else files[0].parent
+        sources.setdefault(str(target).lower(), (target, []))[1].append(source)
+    return {target: found for target, found in sources.values()
+            if len(found) > 1}
+
+def build_image(target: pathlib.Path, files: list, sector_size: int,
+                boot_sectors: bytes, overwrite: bool) -> bool:
+    '''Creates a blank, preallocated image, then writes its file system
+    through a mapping of it.'''
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if not create_blank_image(target, sector_size, dos2.DOS2_SECTOR_COUNT,
+                              overwrite):
+        return False
+
+    try:
+        with AtrImage(target, writable=True) as image:
+            dos2.build_file_system(
+                image, [(dos2.get_dos_filename(file.name), file)
+                        for file in files], boot_sectors)
+    except (ValueError, OSError) as error:
+        target.unlink()
+        click.echo(f'{ERROR_TEXT}{target}: {error}')
+        return False
+
+    return True
+
+def create_blank_image(target: pathlib.Path, sector_size: int,
+                       sector_count: int, overwrite: bool) -> bool:
+    '''Writes an image's header and extends it, sparsely, to its full size.'''
+    header = AtrHeader.build(sector_size, sector_count)
+    try:
+        target_fd = fileops.create_file(target, overwrite)
+    except FileExistsError:
+        click.echo(f'{ERROR_TEXT}{target}: {TARGET_EXISTS}')
+        return False
+    except OSError as error:
+        click.echo(f'{ERROR_TEXT}{target}: {error.strerror}')
+        return False
+
+    try:
+        fileops.write_all(target_fd, header.to_bytes())
+        os.ftruncate(target_fd, ATR_HEADER_SIZE + header.data_size)
+    finally:
+        os.close(target_fd)
+    return True
+
+def convert_dcm(file: pathlib.Path, target: pathlib.Path,
+                overwrite: bool) -> bool:
+    '''Decodes a .dcm image straight into a new (sparse) .atr image.'''
+    with open(file, 'rb') as source:
+        try:
+            image = dcm.DcmImage(source)
+        except ValueError as error:
+            click.echo(f'{ERROR_TEXT}{file}: {error}')
+            return False
+
+        header = AtrHeader.build(image.sector_size, image.sector_count)
+        if not create_blank_image(target, image.sector_size,
+                                  image.sector_count, overwrite):
+            return False
+
+        try:
+            target_fd = os.open(target, os.O_WRONLY)
+            try:
+                for number, data in image.sectors():
+                    if number < 1 or number > image.sector_count:
+                        raise ValueError(f'{INVALID_SECTOR_NUMBER}: {number}')
+                    os.pwrite(target_fd, data, header.sector_offset(number))
+            finally:
+                os.close(target_fd)
+        except ValueError as error:
+            target.unlink()
+            click.echo(f'{ERROR_TEXT}{file}: {error}')
+            return False
+
+    return True
+
+def convert_files(source_path: str, dest_path: str, recurse: bool,
+                  pattern: str, suffix: str, verbose: bool, convert) -> int:
+    '''Converts each file matching pattern, in source_path, to a file with
+    suffix in the same place in dest_path, using convert(file, target).'''
+    files = build_source_file_list(source_path, recurse, pattern)
+
+    if not files:
+        click.echo(f'{ERROR_TEXT}No {pattern[1:]} files found to process.')
+        return ERROR
+
+    failures = 0
+    for file in files:
+        target = get_target_path(file, pathlib.Path(source_path),
+                                 pathlib.Path(dest_path)).with_suffix(suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not convert(file, target):
+            failures += 1
+        elif verbose:
+            click.echo(f'{file}: {CONVERTED} {target}')
+
+    return ERROR if failures else SUCCESS
+
+def xfd_to_atr(file: pathlib.Path, target: pathlib.Path, overwrite: bool,
+               sector_size: int = None) -> bool:
+    '''Writes a header for the .xfd's sector data, then has the OS copy the
+    data after it.'''
+    source_fd = os.open(file, os.O_RDONLY)
+    try:
+        data_size = os.fstat(source_fd).st_size
+        if sector_size is None:
+            sector_size = (XFD_DOUBLE_SECTOR_SIZE
+                           if data_size in XFD_DOUBLE_DENSITY_SIZES
+                           else XFD_SINGLE_SECTOR_SIZE)
+        header = AtrHeader.for_data_size(sector_size, data_size)
+        problems = header.problems(ATR_HEADER_SIZE + data_size)
+        if problems:
+            click.echo(f'{ERROR_TEXT}{file}: '
+                       f'{REASON_SEPARATOR.join(problems)}')
+            return False
+
+        return fileops.copy_to_new_file(source_fd, target, header.to_bytes(),
+                                        0, data_size, overwrite)
+    finally:
+        os.close(source_fd)
+
+def atr_to_xfd(file: pathlib.Path, target: pathlib.Path,
+               overwrite: bool) -> bool:
+    '''Has the OS copy an .atr's sector data, without its header, to a new
+    file.'''
+    source_fd = os.open(file, os.O_RDONLY)
+    try:
+        file_size = os.fstat(source_fd).st_size
+        try:
+            header = AtrHeader(os.pread(source_fd, ATR_HEADER_SIZE, 0))
+        except ValueError as error:
+            click.echo(f'{ERROR_TEXT}{file}: {error}')
+            return False
+        problems = header.problems(file_size)
+        if problems:
+            click.echo(f'{ERROR_TEXT}{file}: '
+                       f'{REASON_SEPARATOR.join(problems)}')
+            return False
+
+        return fileops.copy_to_new_file(source_fd, target, b'',
+                                        ATR_HEADER_SIZE, header.data_size,
+                                        overwrite)
+    finally:
+        os.close(source_fd)
+
+def get_changed_sectors(source: AtrImage, target: AtrImage) -> list:
+    '''Numbers of the target's sectors that differ from the source's, and of
+    any non-empty sectors it has beyond the end of the source.'''
+    if (source.sector_size != target.sector_size or
+        source.header.short_boot_sectors != target.header.short_boot_sectors):
+        raise ValueError(DIFFERENT_LAYOUTS)
+
+    # The (128-byte) boot sectors are compared individually, the rest as one
+    # array of sectors per image.
+    common = min(source.sector_count, target.sector_count)
+    boot_count = min(BOOT_SECTOR_COUNT, target.sector_count)
+    changed = []
+    for number in range(1, boot_count + 1):
+        with target.sector(number) as target_sector:
+            if number > common:
+                if any(target_sector):
+                    changed.append(number)
+                continue
+            with source.sector(number) as source_sector:
+                if source_sector != target_sector:
+                    changed.append(number)
+
+    if target.sector_count > BOOT_SECTOR_COUNT:
+        first = BOOT_SECTOR_COUNT + 1
+        start = target.header.sector_offset(first) - ATR_HEADER_SIZE
+        with (source.data as source_data, target.data as target_data,
+              source_data[start:] as source_sectors,
+              target_data[start:] as target_sectors):
+            changed.extend(first + index for index in compare_sectors(
+                source_sectors, target_sectors, target.sector_size,
+                max(common - BOOT_SECTOR_COUNT, 0),
+                target.sector_count - BOOT_SECTOR_COUNT))
+    return changed
+
+def compare_sectors(source_data: memoryview, target_data: memoryview,
+                    sector_size: int, common: int, count: int) -> list:
+    '''Indexes of the target's sectors that differ from the first common
+    sectors of the source, or are non-empty beyond them.'''
+    source = numpy.frombuffer(source_data, dtype=numpy.uint8,
+                              count=common * sector_size).reshape(
+                                  common, sector_size)
+    target = numpy.frombuffer(target_data, dtype=numpy.uint8,
+                              count=count * sector_size).reshape(
+                                  count, sector_size)
+    changed = numpy.concatenate(((source != target[:common]).any(axis=1),
+                                 target[common:].any(axis=1)))
+    return numpy.flatnonzero(changed).tolist()
+
+def write_delta(source: AtrImage, target: AtrImage, changed: list,
+                delta_path: pathlib.Path, overwrite: bool):
+    with source.data as source_data, target.data as target_data:
+        header = DELTA_HEADER_FORMAT.pack(
+            DELTA_SIGNATURE, DELTA_VERSION, target.header.to_bytes(),
+            zlib.crc32(source_data), zlib.crc32(target_data), len(changed))
+
+    with os.fdopen(fileops.create_file(delta_path, overwrite), 'wb') as delta:
+        delta.write(header)
+        for number in changed:
+            delta.write(DELTA_SECTOR_FORMAT.pack(number))
+            with target.sector(number) as sector:
+                delta.write(sector)
+
+def apply_delta(source_path: pathlib.Path, delta_path: pathlib.Path,
+                target_path: pathlib.Path, overwrite: bool) -> bool:
+    '''Copies the source image's sector data, with the delta's header, to a
+    new image, resizes it, then writes the delta's sectors to it.'''
+    with open(delta_path, 'rb') as delta:
+        data = delta.read(DELTA_HEADER_FORMAT.size)
+        if len(data) != DELTA_HEADER_FORMAT.size:
+            raise ValueError(f'{delta_path}: {INVALID_DELTA}')
+        (signature, version, header_bytes, source_crc, target_crc,
+         count) = DELTA_HEADER_FORMAT.unpack(data)
+        if signature != DELTA_SIGNATURE or version != DELTA_VERSION:
+            raise ValueError(f'{delta_path}: {INVALID_DELTA}')
+        header = AtrHeader(header_bytes)
+
+        with AtrImage(source_path) as source:
+            with source.data as source_data:
+                if zlib.crc32(source_data) != source_crc:
+                    raise ValueError(f'{source_path}: {SOURCE_MISMATCH}')
+                size = min(len(source_data), header.data_size)
+
+        source_fd = os.open(source_path, os.O_RDONLY)
+        try:
+            if not fileops.copy_to_new_file(source_fd, target_path,
+                                            header_bytes, ATR_HEADER_SIZE,
+                                            size, overwrite):
+                return False
+        finally:
+            os.close(source_fd)
+
+        # The new image is removed if the delta turns out to be truncated or
+        # corrupt, so no partial image is left behind.
+        try:
+            write_delta_sectors(delta, delta_path, target_path, header, count)
+            with AtrImage(target_path) as target:
+                with target.data as target_data:
+                    matches = zlib.crc32(target_data) == target_crc
+        except BaseException:
+            target_path.unlink()
+            raise
+
+    if not matches:
+        target_path.unlink()
+        click.echo(f'{ERROR_TEXT}{target_path}: {TARGET_MISMATCH}')
+    return matches
+
+def write_delta_sectors(delta: BinaryIO, delta_path: pathlib.Path,
+                        target_path: pathlib.Path, header: AtrHeader,
+                        count: int):
+    target_fd = os.open(target_path, os.O_WRONLY)
+    try:
+        os.ftruncate(target_fd, ATR_HEADER_SIZE + header.data_size)
+        for _ in range(count):
+            data = delta.read(DELTA_SECTOR_FORMAT.size)
+            if len(data) != DELTA_SECTOR_FORMAT.size:
+                raise ValueError(f'{delta_path}: {INVALID_DELTA}')
+            number = DELTA_SECTOR_FORMAT.unpack(data)[0]
+            length = header.sector_length(number)
+            sector = delta.read(length)
+            if len(sector) != length:
+                raise ValueError(f'{delta_path}: {INVALID_DELTA}')
+            os.pwrite(target_fd, sector, header.sector_offset(number))
+    finally:
+        os.close(target_fd)
+
+def trim_image(file: pathlib.Path, dry_run: bool, verbose: bool) -> dict:
+    '''Trims an image's unused trailing sectors; returns its manifest entry if
+    it was (or would be) trimmed, an empty dict if there was nothing to trim,
+    and None if it couldn't be processed.'''
+    try:
+        file_size = os.stat(file).st_size
+        with AtrImage(file) as image:
+            header = image.header
+            sector_count = image.sector_count
+            problems = header.problems(file_size)
+            if problems:
+                raise ValueError(REASON_SEPARATOR.join(problems))
+            last = dos2.Dos2FileSystem(image).highest_allocated_sector()
+            if last < sector_count:
+                last = get_last_used_sector(image, last + 1)
+    except (ValueError, IndexError) as error:
+        click.echo(f'{ERROR_TEXT}{file}: {error}')
+        return None
+
+    if last >= sector_count:
+        if verbose:
+            click.echo(f'{file}: {NOTHING_TO_TRIM}')
+        return {}
+
+    trimmed_size = header.sector_offset(last + 1)
+    if not dry_run:
+        fd = os.open(file, os.O_RDWR)
+        try:
+            os.pwrite(fd, header.with_data_size(
+                trimmed_size - ATR_HEADER_SIZE).to_bytes(), 0)
+            os.ftruncate(fd, trimmed_size)
+        finally:
+            os.close(fd)
+
+    if verbose:
+        click.echo(f'{file}: {TO_TRIM if dry_run else TRIMMED} '
+                   f'{sector_count} -> {last} sectors')
+    return {'file': str(file.absolute()), 'sector_size': header.sector_size,
+            'sector_count': sector_count,
+            'data_size': header.data_size, 'file_size': file_size,
+            'trimmed_sector_count': last, 'trimmed_file_size': trimmed_size}
+
+def get_last_used_sector(image: AtrImage, first: int) -> int:
+    '''Highest sector number, from first (after the boot sectors) onwards,
+    holding any non-zero data; first - 1 if they're all empty.'''
+    start = image.header.sector_offset(first) - ATR_HEADER_SIZE
+    with image.data as data, data[start:] as sectors:
+        last = get_last_nonzero_index(sectors)
+    return first - 1 if last < 0 else first + last // image.sector_size
+
+def get_last_nonzero_index(data: memoryview) -> int:
+    nonzero = numpy.flatnonzero(numpy.frombuffer(data, dtype=numpy.uint8))
+    return int(nonzero[-1]) if nonzero.size else -1
+
+def expand_image(entry: dict, verbose: bool) -> bool:
+    '''Restores a trimmed image's header size and file size, per its
+    manifest entry.'''
+    file = pathlib.Path(entry['file'])
+    try:
+        fd = os.open(file, os.O_RDWR)
+    except OSError as error:
+        click.echo(f'{ERROR_TEXT}{file}: {error.strerror}')
+        return False
+
+    try:
+        header = AtrHeader(os.pread(fd, ATR_HEADER_SIZE, 0))
+        if (header.sector_size != entry['sector_size'] or
+            header.data_size > entry['data_size']):
+            raise ValueError(GEOMETRY_MISMATCH)
+        os.pwrite(fd, header.with_data_size(entry['data_size']).to_bytes(), 0)
+        os.ftruncate(fd, entry['file_size'])
+    except ValueError as error:
+        click.echo(f'{ERROR_TEXT}{file}: {error}')
+        return False
+    finally:
+        os.close(fd)
+
+    if verbose:
+        click.echo(f'{file}: {EXPANDED} to {entry["sector_count"]} sectors')
+    return True
+
+def verify_file(file: pathlib.Path) -> dict:
+    '''Verifies an image's header against its file size, reading only the
+    header (one 16-byte pread) and the file's size (fstat).  Files that can't
+    be read are invalid, with the error as the reason.'''
+    result = {'file': str(file), 'valid': False, 'sector_size': None,
+              'sector_count': None, 'file_size': None}
+    try:
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            data = os.pread(fd, ATR_HEADER_SIZE, 0)
+            file_size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+    except OSError as error:
+        result['reasons'] = [str(error)]
+        return result
+
+    result['file_size'] = file_size
+    try:
+        header = AtrHeader(data)
+    except ValueError as error:
+        result['reasons'] = [str(error)]
+        return result
+
+    result['reasons'] = header.problems(file_size)
+    result['valid'] = not result['reasons']
+    result['sector_size'] = header.sector_size
+    result['sector_count'] = header.sector_count
+    return result
+
+def echo_verify_result(result: dict, output_format: str):
+    if output_format == FORMAT_JSONL:
+        click.echo(json.dumps(result))
+        return
+
+    sector_size = '' if result['sector_size'] is None else result['sector_size']
+    sector_count = ('' if result['sector_count'] is None
+                    else result['sector_count'])
+    file_size = '' if result['file_size'] is None else result['file_size']
+    click.echo(f'{result["valid"]}{CSV_SEPARATOR}{sector_size}{CSV_SEPARATOR}'
+               f'{sector_count}{CSV_SEPARATOR}{file_size}'
+               f'{CSV_SEPARATOR}{CSV_QUOTE}'
+               f'{REASON_SEPARATOR.join(result["reasons"])}{CSV_QUOTE}'
+               f'{CSV_SEPARATOR}{CSV_QUOTE}{result["file"]}{CSV_QUOTE}')
+
 def get_file_protection_status(file: pathlib.Path) -> bool:
-    with open(file, 'rb') as atr_file:
-        # Read the status byte from the header
-        atr_file.seek(STATUS_BYTE_INDEX)
-        status_byte = atr_file.read(1)[0]
-        atr_file.close()             
+    # Only the status byte is needed; a single pread, with no mapping
+    fd = os.open(file, os.O_RDONLY)
+    try:
+        status_byte = os.pread(fd, 1, STATUS_BYTE_INDEX)
+    finally:
+        os.close(fd)
 
-    return (status_byte & PROTECT_BIT_MASK) != 0
+    if not status_byte:
+        raise ValueError(f'{INVALID_HEADER_SIZE}: {ATR_HEADER_SIZE} bytes')
+    return (status_byte[0] & PROTECT_BIT_MASK) != 0
 
 def set_file_protection(file: pathlib.Path, protect: bool) -> int:
-    with open(file, 'rb+' ) as atr_file:
-        # Read the status byte from the header
-        atr_file.seek(STATUS_BYTE_INDEX)
-        status_byte = atr_file.read(1)[0]
-
-        # Modify the status byte to set or clear the write-protect bit
-        new_status_byte = set_protect_bit(bytes([status_byte]), protect)[0]
-       
-        # Write the modified status byte back to the header
-        atr_file.seek(STATUS_BYTE_INDEX)
-        atr_file.write(bytes([new_status_byte]))
-
-        atr_file.flush()
-        atr_file.close()
+    # Modify the status byte, in the mapped header, to set or clear the
+    # write-protect bit.
+    with AtrImage(file, writable=True) as image:
+        image.write_protected = protect
 
     return SUCCESS
 
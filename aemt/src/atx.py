@@ -0,0 +1,456 @@
+#!python3
+
+# atx.py - Atari 8-bit ATX (VAPI) Protected Disk Image Utility & Functions
+#
+# Copyright(C) 2026, Ian Michael Dunmore
+#
+# License: https://github.com/idunmore/AtariTools/blob/master/LICENSE
+
+# Native Python Modules
+import mmap
+import pathlib
+import struct
+from typing import Iterator, Self
+
+# 3rd Party/External Modules
+import click
+
+# Constants
+
+# Error Messages and Command Result Exit Codes
+ERROR_TEXT ='Error: '
+ERROR = 1
+SUCCESS = 0
+
+# .ATX File Constants
+ATX_PATTERN = '*.atx'
+RECURSE_PATTERN_PREFIX = '**/'
+
+# File Header (48 bytes): signature, version, minimum version, creator,
+# creator version, flags, image type, density, image id, image version,
+# and the start and end of the track records.
+ATX_SIGNATURE = b'AT8X'
+ATX_HEADER_FORMAT = struct.Struct('<4sHHHHIHBxIH2xII12x')
+DENSITY_SINGLE = 0
+DENSITY_ENHANCED = 1
+DENSITY_DOUBLE = 2
+DENSITY_NAMES = {DENSITY_SINGLE: 'SD', DENSITY_ENHANCED: 'ED',
+                 DENSITY_DOUBLE: 'DD'}
+DENSITY_SECTOR_SIZES = {DENSITY_SINGLE: 128, DENSITY_ENHANCED: 128,
+                        DENSITY_DOUBLE: 256}
+TRACK_COUNT = 40
+
+# Records: size, type, track number, sector count, rate, flags and the size
+# of the track header (the offset of its first chunk).
+RECORD_FORMAT = struct.Struct('<IH2xBxHHxxII8x')
+RECORD_TYPE_TRACK = 0x0000
+RECORD_TYPE_HOST = 0x0100
+
+# Chunks, within a track record: size, type, sector index and header data.
+# A size of zero ends the track's chunks.
+CHUNK_FORMAT = struct.Struct('<IBBH')
+CHUNK_SECTOR_DATA = 0x00
+CHUNK_SECTOR_LIST = 0x01
+CHUNK_WEAK_SECTOR = 0x10
+CHUNK_EXTENDED_HEADER = 0x11
+
+# Sector List Entries: sector number, FDC status, angular position and the
+# offset of the sector's data (from the start of the track record).
+SECTOR_FORMAT = struct.Struct('<BBHI')
+
+# FDC Status Bits
+STATUS_LOST_DATA = 0x04
+STATUS_CRC_ERROR = 0x08
+STATUS_MISSING = 0x10
+STATUS_DELETED = 0x20
+
+# Positions are in 8us units; one rotation (at 288 RPM) is 26042 units.
+ROTATION_UNITS = 26042
+
+# Extended sector sizes, by size code
+EXTENDED_SECTOR_SIZES = (128, 256, 512, 1024)
+
+# Report Constants
+CSV_SEPARATOR = ','
+CSV_QUOTE = '"'
+LISTING_INDENT = '  '
+TIMING_SEPARATOR = '@'
+MISSING_MARKER = 'M'
+CRC_ERROR_MARKER = 'C'
+DELETED_MARKER = 'D'
+WEAK_MARKER = 'W'
+MARKER_SEPARATOR = ':'
+PROBLEM_SEPARATOR = '; '
+
+# Error Messages
+INVALID_SIGNATURE = 'Not an ATX image; invalid signature'
+INVALID_HEADER_SIZE = 'Invalid .atx header size; expected'
+INVALID_DATA_RANGE = 'Track data outside the file'
+INVALID_RECORD = 'Invalid record at offset'
+INVALID_CHUNK = 'Invalid chunk in track'
+UNKNOWN_DENSITY = 'Unknown density'
+INVALID_TRACK_NUMBER = 'Invalid track number'
+DUPLICATE_TRACK = 'Duplicate track'
+SECTOR_COUNT_MISMATCH = 'Sector list does not match the sector count of track'
+SECTOR_DATA_OUTSIDE_TRACK = 'Sector data outside its track record; track'
+INVALID_POSITION = 'Sector position beyond one rotation; track'
+
+class AtxSector:
+    '''A sector's entry in a track's sector list.'''
+    __slots__ = ('_number', '_status', '_position', '_data_offset',
+                 '_weak_offset', '_size')
+
+    def __init__(self: Self, number: int, status: int, position: int,
+                 data_offset: int, size: int, weak_offset: int = None):
+        self._number = number
+        self._status = status
+        self._position = position
+        self._data_offset = data_offset
+        self._weak_offset = weak_offset
+        self._size = size
+
+    @property
+    def number(self: Self) -> int:
+        return self._number
+
+    @property
+    def status(self: Self) -> int:
+        '''The FDC status the drive reports for the sector.'''
+        return self._status
+
+    @property
+    def position(self: Self) -> int:
+        '''Angular position of the sector, in 8us units from the index.'''
+        return self._position
+
+    @property
+    def data_offset(self: Self) -> int:
+        '''Offset of the sector's data, from the start of its track record.'''
+        return self._data_offset
+
+    @property
+    def size(self: Self) -> int:
+        return self._size
+
+    @property
+    def weak_offset(self: Self) -> int:
+        '''Offset, in the sector, at which its data becomes unreliable; None
+        if the sector isn't weak.'''
+        return self._weak_offset
+
+    @property
+    def is_missing(self: Self) -> bool:
+        return (self._status & STATUS_MISSING) != 0
+
+    @property
+    def has_crc_error(self: Self) -> bool:
+        return (self._status & STATUS_CRC_ERROR) != 0
+
+    @property
+    def is_deleted(self: Self) -> bool:
+        return (self._status & STATUS_DELETED) != 0
+
+    @property
+    def is_weak(self: Self) -> bool:
+        return self._weak_offset is not None
+
+class AtxTrack:
+    '''A track record, with its sector list.'''
+    __slots__ = ('_number', '_sector_count', '_flags', '_sectors',
+                 '_problems')
+
+    def __init__(self: Self, number: int, sector_count: int, flags: int,
+                 sectors: list, problems: list):
+        self._number = number
+        self._sector_count = sector_count
+        self._flags = flags
+        self._sectors = sectors
+        self._problems = problems
+
+    @property
+    def number(self: Self) -> int:
+        return self._number
+
+    @property
+    def sector_count(self: Self) -> int:
+        '''Number of sectors, per the track header.'''
+        return self._sector_count
+
+    @property
+    def flags(self: Self) -> int:
+        return self._flags
+
+    @property
+    def sectors(self: Self) -> list:
+        '''The sector list, in the order the sectors pass the drive head.'''
+        return self._sectors
+
+    @property
+    def problems(self: Self) -> list:
+        '''Structural problems found while parsing the track.'''
+        return self._problems
+
+    @property
+    def duplicate_count(self: Self) -> int:
+        '''Number of sectors whose number appears earlier in the track (as
+        used by some protection schemes).'''
+        return len(self._sectors) - len({sector.number
+                                         for sector in self._sectors})
+
+class AtxImage:
+    '''A memory-mapped .ATX disk image; the header is parsed when opened, and
+    the track records as they're requested.
+
+    Use as a context manager.
+    '''
+    def __init__(self: Self, file: pathlib.Path):
+        self._file = open(file, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            self._file.close()
+            raise ValueError(f'{INVALID_HEADER_SIZE}: '
+                             f'{ATX_HEADER_FORMAT.size} bytes, got: 0')
+        try:
+            self._parse_header()
+        except ValueError:
+            self.close()
+            raise
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args):
+        self.close()
+
+    def close(self: Self):
+        if self._file.closed:
+            return
+        self._mmap.close()
+        self._file.close()
+
+    @property
+    def version(self: Self) -> int:
+        return self._version
+
+    @property
+    def density(self: Self) -> int:
+        return self._density
+
+    @property
+    def density_name(self: Self) -> str:
+        return DENSITY_NAMES[self._density]
+
+    @property
+    def sector_size(self: Self) -> int:
+        return DENSITY_SECTOR_SIZES[self._density]
+
+    def tracks(self: Self) -> Iterator[AtxTrack]:
+        '''Yields each track record, in file order; other records (e.g. host
+        data) are skipped.  ValueError is raised if a record or chunk
+        doesn't fit in the track data.'''
+        offset = self._data_start
+        while offset + RECORD_FORMAT.size <= self._data_end:
+            (size, record_type, number, sector_count, _, flags,
+             header_size) = RECORD_FORMAT.unpack_from(self._mmap, offset)
+            if size < RECORD_FORMAT.size or offset + size > self._data_end:
+                raise ValueError(f'{INVALID_RECORD} {offset}')
+            if record_type == RECORD_TYPE_TRACK:
+                yield self._parse_track(offset, size, number, sector_count,
+                                        flags, header_size)
+            offset += size
+
+    def _parse_header(self: Self):
+        if len(self._mmap) < ATX_HEADER_FORMAT.size:
+            raise ValueError(f'{INVALID_HEADER_SIZE}: '
+                             f'{ATX_HEADER_FORMAT.size} bytes, got: '
+                             f'{len(self._mmap)}')
+        (signature, self._version, _, _, _, _, _, self._density, _, _,
+         self._data_start, self._data_end) = ATX_HEADER_FORMAT.unpack_from(
+             self._mmap)
+        if signature != ATX_SIGNATURE:
+            raise ValueError(f'{INVALID_SIGNATURE}: {signature}')
+        if self._density not in DENSITY_NAMES:
+            raise ValueError(f'{UNKNOWN_DENSITY}: {self._density}')
+        if (self._data_start < ATX_HEADER_FORMAT.size or
+            self._data_start > self._data_end or
+            self._data_end > len(self._mmap)):
+            raise ValueError(INVALID_DATA_RANGE)
+
+    def _parse_track(self: Self, offset: int, size: int, number: int,
+                     sector_count: int, flags: int,
+                     header_size: int) -> AtxTrack:
+        entries = []
+        problems = []
+        weak_offsets = {}
+        extended_sizes = {}
+        end = offset + size
+        chunk_offset = offset + header_size
+        while chunk_offset + CHUNK_FORMAT.size <= end:
+            chunk_size, chunk_type, index, data = CHUNK_FORMAT.unpack_from(
+                self._mmap, chunk_offset)
+            if chunk_size == 0:
+                break
+            if chunk_size < CHUNK_FORMAT.size or chunk_offset + chunk_size > end:
+                raise ValueError(f'{INVALID_CHUNK} {number}')
+
+            if chunk_type == CHUNK_SECTOR_LIST:
+                list_offset = chunk_offset + CHUNK_FORMAT.size
+                count = ((chunk_size - CHUNK_FORMAT.size) //
+                         SECTOR_FORMAT.size)
+                entries.extend(SECTOR_FORMAT.iter_unpack(self._mmap[
+                    list_offset:list_offset + count * SECTOR_FORMAT.size]))
+            elif chunk_type == CHUNK_WEAK_SECTOR:
+                weak_offsets[index] = data
+            elif chunk_type == CHUNK_EXTENDED_HEADER:
+                extended_sizes[index] = EXTENDED_SECTOR_SIZES[
+                    data & (len(EXTENDED_SECTOR_SIZES) - 1)]
+            chunk_offset += chunk_size
+
+        # Weak and extended sector chunks refer to the sector list by index
+        sectors = [AtxSector(*entry,
+                             extended_sizes.get(index, self.sector_size),
+                             weak_offsets.get(index))
+                   for index, entry in enumerate(entries)]
+
+        if len(sectors) != sector_count:
+            problems.append(f'{SECTOR_COUNT_MISMATCH} {number}')
+        for sector in sectors:
+            if (not sector.is_missing and
+                sector.data_offset + sector.size > size):
+                problems.append(f'{SECTOR_DATA_OUTSIDE_TRACK} {number}, '
+                                f'sector {sector.number}')
+        if any(sector.position >= ROTATION_UNITS for sector in sectors):
+            problems.append(f'{INVALID_POSITION} {number}')
+
+        return AtxTrack(number, sector_count, flags, sectors, problems)
+
+@click.group()
+@click.version_option('0.0.1.1')
+def atx():
+    '''Inspects Atari 8-bit .ATX (VAPI) protected disk images.'''
+    pass
+
+@atx.command('info')
+@click.option('-c', '--csv', is_flag=True, default=False,
+    help='Output in CSV format')
+@click.option('-h', '--header', is_flag=True, default=False,
+    help='Output a header if in CSV format')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .atx files')
+@click.option('-t', '--timing', is_flag=True, default=False,
+    help='List the sectors of each track, with their positions')
+@click.argument('source_path',
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def info(csv: bool, header: bool, recurse: bool, timing: bool,
+         source_path: str):
+    '''Report the tracks and sectors of .ATX disk images, and validate them.
+
+    SOURCE_PATH may be a directory or a file; if a directory *only* .atx files
+    will be processed.  The -r/--recurse option will include subdirectories.
+
+    \b
+    Reports the number of tracks and sectors, and the sectors that are
+    missing, have CRC errors, are deleted, weak or duplicated.  With
+    -t/--timing each track's sectors are listed, as NUMBER@POSITION
+    (in 8us units from the index), marked M (missing), C (CRC error),
+    D (deleted) and W (weak).  Structural problems are reported as errors.
+    '''
+    files = build_source_file_list(source_path, recurse)
+
+    if not files:
+        click.echo(ERROR_TEXT + 'No .atx files found to process.')
+        exit(ERROR)
+
+    if csv and header:
+        click.echo('Density,Tracks,Sectors,Missing,CRC Errors,Deleted,Weak,'
+                   'Duplicates,Problems,Image')
+
+    failures = 0
+    for file in files:
+        if not report_image(file, csv, timing):
+            failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+def build_source_file_list(source_path: str, recurse: bool) -> list:
+    # We can work on a single file, or a directory (with optional recursion)
+    source_path = pathlib.Path(source_path)
+    if source_path.is_file():
+        return [source_path]
+    pattern = RECURSE_PATTERN_PREFIX + ATX_PATTERN if recurse else ATX_PATTERN
+    files = [file for file in source_path.glob(pattern) if file.is_file()]
+    files.sort(key=lambda x: x.name.lower())
+    return files
+
+def report_image(file: pathlib.Path, csv: bool, timing: bool) -> bool:
+    counts = {'tracks': 0, 'sectors': 0, 'missing': 0, 'crc_errors': 0,
+              'deleted': 0, 'weak': 0, 'duplicates': 0}
+    problems = []
+    track_numbers = set()
+    try:
+        with AtxImage(file) as image:
+            density = image.density_name
+            if timing and not csv:
+                click.echo(f'{file}:')
+            for track in image.tracks():
+                if track.number >= TRACK_COUNT:
+                    problems.append(f'{INVALID_TRACK_NUMBER}: {track.number}')
+                if track.number in track_numbers:
+                    problems.append(f'{DUPLICATE_TRACK}: {track.number}')
+                track_numbers.add(track.number)
+                problems.extend(track.problems)
+                count_track(track, counts)
+                if timing and not csv:
+                    echo_track_timing(track)
+    except ValueError as error:
+        click.echo(f'{ERROR_TEXT}{file}: {error}')
+        return False
+
+    if csv:
+        click.echo(f'{density}{CSV_SEPARATOR}{counts["tracks"]}{CSV_SEPARATOR}'
+                   f'{counts["sectors"]}{CSV_SEPARATOR}{counts["missing"]}'
+                   f'{CSV_SEPARATOR}{counts["crc_errors"]}{CSV_SEPARATOR}'
+                   f'{counts["deleted"]}{CSV_SEPARATOR}{counts["weak"]}'
+                   f'{CSV_SEPARATOR}{counts["duplicates"]}{CSV_SEPARATOR}'
+                   f'{CSV_QUOTE}{PROBLEM_SEPARATOR.join(problems)}{CSV_QUOTE}'
+                   f'{CSV_SEPARATOR}{CSV_QUOTE}{file}{CSV_QUOTE}')
+    else:
+        click.echo(f'{file}: {density}, {counts["tracks"]} tracks, '
+                   f'{counts["sectors"]} sectors ({counts["missing"]} missing, '
+                   f'{counts["crc_errors"]} CRC errors, {counts["deleted"]} '
+                   f'deleted, {counts["weak"]} weak, {counts["duplicates"]} '
+                   f'duplicates)')
+        for problem in problems:
+            click.echo(f'{ERROR_TEXT}{file}: {problem}')
+
+    return not problems
+
+def count_track(track: AtxTrack, counts: dict):
+    counts['tracks'] += 1
+    counts['sectors'] += len(track.sectors)
+    counts['duplicates'] += track.duplicate_count
+    for sector in track.sectors:
+        counts['missing'] += sector.is_missing
+        counts['crc_errors'] += sector.has_crc_error
+        counts['deleted'] += sector.is_deleted
+        counts['weak'] += sector.is_weak
+
+def echo_track_timing(track: AtxTrack):
+    sectors = ' '.join(get_sector_timing(sector) for sector in track.sectors)
+    click.echo(f'{LISTING_INDENT}Track {track.number:02}: {sectors}')
+
+def get_sector_timing(sector: AtxSector) -> str:
+    markers = ''.join(marker for flag, marker in (
+        (sector.is_missing, MISSING_MARKER),
+        (sector.has_crc_error, CRC_ERROR_MARKER),
+        (sector.is_deleted, DELETED_MARKER),
+        (sector.is_weak, WEAK_MARKER)) if flag)
+    timing = f'{sector.number:02}{TIMING_SEPARATOR}{sector.position:05}'
+    return f'{timing}{MARKER_SEPARATOR}{markers}' if markers else timing
+
+# Run!
+if __name__ == '__main__':
+    atx()
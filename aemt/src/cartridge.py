@@ -9,11 +9,19 @@
 # Native Python Modules
 
 import enum
+import hashlib
+import mmap
+import os
 import pathlib
-from typing import Self
+import struct
+from typing import Iterator, Self
 
 # 3rd Party/External Modules
 import click
+import numpy
+
+# Local Application Modules
+import fileops
 
 # Constants
 
@@ -29,18 +37,18 @@ VERBOSE = 2
 
 # General Constants
 BYTES_PER_KILOBYTE = 1024
-
-# MSB (Most Significant Bit) Constants
-MSB_DIGIT_1 = 256 * 256 * 256
-MSB_DIGIT_2 = 256 * 256
-MSB_DIGIT_3 = 256
-MSB_DIGIT_4 = 1
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
 
 # Cartridge Constants
 
-CART_PATTERN = '*.car'
-CART_PATTERN_RECR = '**/*.car'
+CART_PATTERNS = ['*.car']
+ROM_PATTERNS = ['*.rom', '*.bin', '*.a52']
+RECURSE_PATTERN_PREFIX = '**/'
+CART_SUFFIX = '.car'
+ROM_SUFFIX = '.rom'
+A5200_SUFFIX = '.a52'
 CHECKSUM_MASK = 0x000000FF
+CHECKSUM_FIELD_MASK = 0xFFFFFFFF
 FIRST_CARTRIDGE_TYPE = 1
 LAST_CARTRIDGE_TYPE = 70
 CART_HEADER_SIZE = 16
@@ -54,14 +62,56 @@ CHECKSUM_OFFSET = 8
 CHECKSUM_LENGTH = 4
 IMAGE_OFFSET = 16
 
+# Header layout: 'CART' signature, big-endian (MSB first) type and checksum,
+# followed by four unused bytes.
+CART_HEADER_FORMAT = struct.Struct('>4sII4x')
+CHECKSUM_FORMAT = struct.Struct('>I')
+
 # Cartridge (In)validity Reasons
 INVALID_SIGNATURE = 'Invalid signature'
 INVALID_TYPE = 'Invalid or unknown cartridge type'
 INVALID_CHECKSUM = 'Header checksum mismatch with cartridge'
 INVALID_SIZE = 'Invalid cartridge size'
 INVALID_HEADER_SIZE = 'Invalid cartridge header size; expected'
+INVALID_IMAGE_SIZE = 'File size mismatch with cartridge type'
 VALID = 'Valid'
 
+# Conversion Messages
+ROM_SIZE_MISMATCH = 'ROM size does not match cartridge type'
+STRIPPED = 'Stripped to'
+WRAPPED = 'Wrapped as'
+
+# Repair Messages
+CHECKSUM_FIXED = 'Checksum fixed'
+CHECKSUM_TO_FIX = 'Checksum would be fixed'
+CHECKSUM_OK = 'Checksum OK'
+
+# Bank Status
+BANK_EMPTY_FF = 'Empty ($FF)'
+BANK_EMPTY_00 = 'Empty ($00)'
+BANK_FILLED = 'Filled'
+BANK_FILE_SUFFIX = '.bin'
+MIN_REPEAT_SIZE = 2 * 1024
+
+# Headerless ROM Constants
+BANK_SIZE_8K = 8 * BYTES_PER_KILOBYTE
+BANK_SIZE_16K = 16 * BYTES_PER_KILOBYTE
+WINDOW_START_8000 = 0x8000
+WINDOW_START_A000 = 0xA000
+WINDOW_END = 0xBFFF
+WINDOW_END_LOW = 0x9FFF
+VECTORS_LENGTH = 6
+CART_PRESENT_FLAG = 0x00
+CART_5200_VECTOR_START = 0x4000
+BANK_REGISTER_PAGE = 0xD5
+ABSOLUTE_OPCODES = [0x2C, 0x8C, 0x8D, 0x8E, 0x99, 0x9D, 0xAC, 0xAD, 0xAE,
+                    0xB9, 0xBD]
+VECTOR_WEIGHT = 0.6
+BANK_SWITCH_WEIGHT = 0.4
+MACHINE_MISMATCH_PENALTY = 0.5
+ANY_BANK_REGISTER_PENALTY = 0.75
+NO_MATCHING_TYPES = 'No cartridge types match this size'
+
 # Format Constants
 CSV_SEPARATOR = ','
 CSV_QUOTE = '"'
@@ -75,6 +125,8 @@ CSV_TYPE_WIDTH = 1
 TYPE_WIDTH = 2
 CSV_DESCRIPTION_WIDTH = 1
 DESCRIPTION_WIDTH = 46
+CHECKSUM_WIDTH = 10
+NOT_COMPUTED = 'N/A'
 
 
 # Machines Types
@@ -195,70 +247,536 @@ cart_types = {
     70: CartridgeType(70, 64, Machine.ATARI_800_XL_XE, 'aDawliah 64 KB cartridge')
 }
 
+# Bank-switched cartridge layouts, for headerless ROM inference.  Types not
+# listed here map their whole image into one window ending at $BFFF (or at
+# $9FFF for LOW_WINDOW_TYPES), with the init/run vectors at the end of it.
+BANKED_8K_BOOT_FIRST = {8, 9, 10, 11, 17, 22, 41, 43, 48, 49, 50, 51, 52, 60,
+                        62, 65, 66, 68, 69, 70}
+BANKED_8K_BOOT_LAST = {5, 12, 13, 14, 23, 24, 25, 33, 34, 35, 36, 37, 38, 42,
+                       67}
+BANKED_16K_BOOT_FIRST = {27, 28, 29, 30, 31, 32, 54, 55, 56, 61, 63, 64}
+LOW_WINDOW_TYPES = {21, 53, 59}
+
+# $D5xx (CCTL) addresses used to switch banks, where a cartridge family uses
+# a distinctive range; other banked types may use any of $D500-$D5FF.
+BANK_REGISTERS = {
+    8: (0x00, 0x0F), 22: (0x00, 0x0F), 9: (0x70, 0x7F), 10: (0xD0, 0xDF),
+    11: (0xE0, 0xFF), 43: (0xE0, 0xFF), 41: (0x00, 0x20), 42: (0x00, 0x80),
+    50: (0x00, 0x1F), 51: (0x00, 0x1F), 54: (0x00, 0x1F), 55: (0x00, 0x1F),
+    56: (0x00, 0x1F), 62: (0xA0, 0xAF), 65: (0xA0, 0xAF), 66: (0xA0, 0xAF)
+}
+ANY_BANK_REGISTER = (0x00, 0xFF)
+
+def build_size_index(types: dict) -> dict:
+    '''Maps image sizes, in bytes, to the list of matching cartridge types.'''
+    index = {}
+    for cart in types.values():
+        size = cart.size_kilobytes * BYTES_PER_KILOBYTE
+        index.setdefault(size, []).append(cart)
+    return index
+
+# Cartridge types, by image size (in bytes); built ONCE.
+cart_types_by_size = build_size_index(cart_types)
+
 class CartridgeHeader:
-    def __init__(self: Self, bytes: bytes):
+    '''Cartridge header, parsed once, with cached validation results.'''
+    __slots__ = ('_signature', '_type', '_checksum', '_data', '_file',
+                 '_file_size', '_verify_checksum', '_actual_checksum',
+                 '_invalid_reason')
+
+    def __init__(self: Self, bytes: bytes, actual_checksum: int = None,
+                 file: pathlib.Path = None, file_size: int = None,
+                 verify_checksum: bool = True):
+        '''Cartridge header from the leading bytes of a .car file.
+
+        If the payload checksum is already known (e.g. it was streamed from
+        the file), pass it as actual_checksum and only the header bytes are
+        needed.  Otherwise it is computed, once and only when first needed,
+        from the given file or from the bytes following the header.
+
+        If verify_checksum is False the payload is never read; validation
+        then only covers the signature, the type and the file size.
+        '''
         if (len(bytes)) < CART_HEADER_SIZE:
             raise ValueError(
                 f'{INVALID_HEADER_SIZE}: {CART_HEADER_SIZE} '
                 f'bytes, got: {len(bytes)}')
-        self._raw_bytes = bytes
+        signature, self._type, self._checksum = (
+            CART_HEADER_FORMAT.unpack_from(bytes))
+        self._signature = signature.decode('latin-1')
+        self._data = bytes
+        self._file = file
+        # Without a file, or a known checksum, the bytes ARE the whole image
+        if file_size is None and file is None and actual_checksum is None:
+            file_size = len(bytes)
+        self._file_size = file_size
+        self._verify_checksum = verify_checksum
+        self._actual_checksum = actual_checksum
         self._invalid_reason = None
 
+    @classmethod
+    def from_file(cls, file: pathlib.Path,
+                  verify_checksum: bool = True) -> Self:
+        '''Reads only the header of a .car file (a single 16-byte pread), and
+        its size; the payload checksum is streamed from the file if, and
+        when, it is needed.'''
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            data = os.pread(fd, CART_HEADER_SIZE, 0)
+            file_size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        return cls(data, file=file, file_size=file_size,
+                   verify_checksum=verify_checksum)
+
     @property
     def signature(self: Self) -> str:
-        sig = self._raw_bytes[SIG_OFFSET:SIG_LENGTH]
-        return f'{chr(sig[0])}{chr(sig[1])}{chr(sig[2])}{chr(sig[3])}'
+        return self._signature
     
     @property
     def type(self: Self) -> int:
-        type = self._raw_bytes[TYPE_OFFSET:TYPE_OFFSET + TYPE_LENGTH]
-        return ((type[0] * MSB_DIGIT_1) + (type[1] * MSB_DIGIT_2) +
-                (type[2] * MSB_DIGIT_3) + (type[3] * MSB_DIGIT_4))
+        return self._type
 
     @property
     def checksum(self: Self) -> int:
-        checksum = (
-            self._raw_bytes[CHECKSUM_OFFSET:CHECKSUM_OFFSET + CHECKSUM_LENGTH])
-        return ((checksum[0] * MSB_DIGIT_1) + (checksum[1] * MSB_DIGIT_2) +
-                (checksum[2] * MSB_DIGIT_3) + (checksum[3] * MSB_DIGIT_4))        
+        return self._checksum
+
+    @property
+    def expected_file_size(self: Self) -> int:
+        '''File size implied by the cartridge type; None if type unknown.'''
+        if self._type not in cart_types:
+            return None
+        return (CART_HEADER_SIZE +
+                cart_types[self._type].size_kilobytes * BYTES_PER_KILOBYTE)
+
+    @property
+    def actual_checksum(self: Self) -> int:
+        '''Checksum of the cartridge data that follows the header; None if
+        checksum verification is disabled.'''
+        if self._actual_checksum is None and self._verify_checksum:
+            if self._file is not None:
+                self._actual_checksum = compute_file_checksum(self._file)
+            else:
+                self._actual_checksum = compute_checksum(
+                    memoryview(self._data)[IMAGE_OFFSET:])
+        return self._actual_checksum
     
     @property
     def description(self: Self) -> str:
-        if self.type in cart_types:
-            return cart_types[self.type].description
+        if self._type in cart_types:
+            return cart_types[self._type].description
         else:
             return INVALID_TYPE
     
     @property
     def is_valid(self: Self) -> bool:
-        if self.signature != CART_PREAMBLE:
-            self._invalid_reason = INVALID_SIGNATURE
-            return False
-        if self.type not in cart_types:
-            self._invalid_reason = INVALID_TYPE
-            return False
-        if self.checksum != compute_checksum(self._raw_bytes[IMAGE_OFFSET:]):
-            self._invalid_reason = INVALID_CHECKSUM
-            return False
-        
-        self._invalid_reason = VALID
-        return True
+        return self.invalid_reason == VALID
     
     @property
     def invalid_reason(self: Self) -> str:
-        '''Reason cartridge is invalid, if any; otherwise None'''
-        # Invoke "is_valid" to set the invalid reason
-        is_valid = self.is_valid
+        '''Reason cartridge is invalid, if any; otherwise VALID'''
+        if self._invalid_reason is None:
+            self._invalid_reason = self._validate()
         return self._invalid_reason
 
+    def _validate(self: Self) -> str:
+        if self._signature != CART_PREAMBLE:
+            return INVALID_SIGNATURE
+        if self._type not in cart_types:
+            return INVALID_TYPE
+        if (self._file_size is not None and
+            self._file_size != self.expected_file_size):
+            return INVALID_IMAGE_SIZE
+        # The header field is 32 bits; larger sums wrap around
+        if (self._verify_checksum and self._checksum !=
+            self.actual_checksum & CHECKSUM_FIELD_MASK):
+            return INVALID_CHECKSUM
+        
+        return VALID
+
+class RomCandidate:
+    '''A cartridge type inferred for a headerless ROM image, with its score.'''
+    __slots__ = ('_cart_type', '_score')
+
+    def __init__(self: Self, cart_type: CartridgeType, score: float):
+        self._cart_type = cart_type
+        self._score = score
+
+    @property
+    def cart_type(self: Self) -> CartridgeType:
+        return self._cart_type
+
+    @property
+    def score(self: Self) -> float:
+        '''Likelihood score, from 0.0 (unlikely) to 1.0 (very likely).'''
+        return self._score
+
+class RomAnalysis:
+    '''Vectorized inspection of a headerless ROM image's data.
+
+    Vector checks are computed for every bank at once, and cached per bank
+    layout, so each candidate type only has to index into the results.
+    '''
+    def __init__(self: Self, data: numpy.ndarray):
+        self._data = data
+        self._vector_checks = {}
+        self._register_counts = count_bank_register_references(data)
+
+    @property
+    def register_references(self: Self) -> int:
+        '''Total number of absolute $D5xx references found in the image.'''
+        return int(self._register_counts.sum())
+
+    def register_fraction(self: Self, first: int, last: int) -> float:
+        '''Fraction of $D5xx references that fall in $D5<first>-$D5<last>.'''
+        total = self.register_references
+        if total == 0:
+            return 0.0
+        return float(self._register_counts[first:last + 1].sum()) / total
+
+    def vector_scores(self: Self, bank_size: int,
+                      window_start: int, window_end: int) -> numpy.ndarray:
+        '''Scores (0.0 - 1.0) the init/run vectors at the end of every bank,
+        as they would appear in a window of window_start - window_end.'''
+        key = (bank_size, window_start, window_end)
+        if key not in self._vector_checks:
+            banks = self._data.reshape(-1, bank_size)
+            vectors = banks[:, -VECTORS_LENGTH:].astype(numpy.uint16)
+            run = vectors[:, 0] | (vectors[:, 1] << 8)
+            init = vectors[:, 4] | (vectors[:, 5] << 8)
+            checks = ((vectors[:, 2] == CART_PRESENT_FLAG).astype(int) +
+                      ((run >= window_start) & (run <= window_end)) +
+                      ((init >= window_start) & (init <= window_end)))
+            self._vector_checks[key] = checks / 3
+        return self._vector_checks[key]
+
+    def vector_5200_score(self: Self) -> float:
+        '''Scores the 5200 start vector, at the very end of the image.'''
+        vectors = self._data[-VECTORS_LENGTH:].astype(numpy.uint16)
+        start = int(vectors[4] | (vectors[5] << 8))
+        valid_vector = CART_5200_VECTOR_START <= start <= WINDOW_END
+        # An 8-bit computer style cart-present flag and run vector makes it
+        # LESS likely this is a 5200 image.
+        a8_vectors = self.vector_scores(len(self._data), WINDOW_START_A000,
+                                        WINDOW_END)[0] == 1.0
+        return (0.5 if valid_vector else 0.0) + (0.0 if a8_vectors else 0.5)
+
+    def score(self: Self, cart_type: CartridgeType) -> float:
+        '''Scores how well the image matches the given cartridge type.'''
+        if cart_type.machine == Machine.ATARI_5200:
+            vector_score = self.vector_5200_score()
+        else:
+            bank_size, boot_bank, window_start, window_end = (
+                get_rom_layout(cart_type, len(self._data)))
+            vector_score = self.vector_scores(
+                bank_size, window_start, window_end)[boot_bank]
+
+        # Bank-switched types should contain bank-switching code; others
+        # should not.
+        if cart_type.type in BANK_REGISTERS:
+            bank_switch_score = self.register_fraction(
+                *BANK_REGISTERS[cart_type.type])
+        elif is_banked_type(cart_type):
+            # Matching ANY register is weaker evidence than a distinctive one
+            bank_switch_score = (self.register_fraction(*ANY_BANK_REGISTER) *
+                                 ANY_BANK_REGISTER_PENALTY)
+        else:
+            bank_switch_score = 0.0 if self.register_references else 1.0
+
+        return (VECTOR_WEIGHT * float(vector_score) +
+                BANK_SWITCH_WEIGHT * bank_switch_score)
+
+class CartridgeImage:
+    '''A memory-mapped .car file, exposing its data and banks as zero-copy
+    (memoryview) slices of the mapping.
+
+    Use as a context manager; views obtained from the image must not be kept
+    beyond its "with" block.
+    '''
+    def __init__(self: Self, file: pathlib.Path):
+        self._file = open(file, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            self._file.close()
+            raise ValueError(f'{INVALID_HEADER_SIZE}: {CART_HEADER_SIZE} '
+                             f'bytes, got: 0')
+        self._view = memoryview(self._mmap)
+        try:
+            self._header = CartridgeHeader(
+                bytes(self._view[:CART_HEADER_SIZE]), file=file,
+                file_size=len(self._mmap))
+        except ValueError:
+            self.close()
+            raise
+        self._data = self._view[IMAGE_OFFSET:]
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args):
+        self.close()
+
+    def close(self: Self):
+        if self._file.closed:
+            return
+        if hasattr(self, '_data'):
+            self._data.release()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    @property
+    def header(self: Self) -> CartridgeHeader:
+        return self._header
+
+    @property
+    def data(self: Self) -> memoryview:
+        '''The cartridge data (everything after the header).'''
+        return self._data
+
+    @property
+    def bank_size(self: Self) -> int:
+        '''Bank size, in bytes, for the cartridge's type.'''
+        return get_bank_size(cart_types[self._header.type])
+
+    @property
+    def bank_count(self: Self) -> int:
+        '''Number of banks; a trailing partial bank counts as a bank.'''
+        return -(-len(self._data) // self.bank_size)
+
+    def banks(self: Self) -> Iterator[memoryview]:
+        '''Yields each bank, lazily, as a view of the mapped file.  Each view
+        is released when the next one is requested.'''
+        bank_size = self.bank_size
+        for start in range(0, len(self._data), bank_size):
+            with self._data[start:start + bank_size] as bank:
+                yield bank
+
+class BankAnalysis:
+    '''Empty, mirrored and overdumped bank analysis of a cartridge image.'''
+    __slots__ = ('bank_size', 'bank_count', 'empty_ff', 'empty_00', 'mirrors',
+                 'data_size', 'repeat_size', 'used_size')
+
+    def __init__(self: Self, bank_size: int, bank_count: int, data_size: int):
+        self.bank_size = bank_size
+        self.bank_count = bank_count
+        self.data_size = data_size
+        self.empty_ff = []
+        '''Indexes of banks filled entirely with $FF.'''
+        self.empty_00 = []
+        '''Indexes of banks filled entirely with $00.'''
+        self.mirrors = {}
+        '''Non-empty banks that duplicate an earlier bank: {bank: original}'''
+        self.repeat_size = data_size
+        '''Size of the block the data is a repetition of (if it isn't, this is
+        the size of the data).'''
+        self.used_size = data_size
+        '''Size of the data, excluding trailing empty banks.'''
+
+    @property
+    def effective_size(self: Self) -> int:
+        '''Smallest size the cartridge data could be trimmed to.'''
+        return min(self.repeat_size, self.used_size)
+
+    @property
+    def is_overdumped(self: Self) -> bool:
+        return self.effective_size < self.data_size
+
 # General Atari Functions
 def compute_checksum(bytes: bytes) -> int:
     '''Computes the .car checksum for a sequence of bytes'''
+    # Sum in fixed-size chunks, so the widened (uint64) intermediate values
+    # NumPy uses for the reduction never exceed one chunk's worth of memory.
+    data = memoryview(bytes).cast('B')
+    result = 0
+    for start in range(0, len(data), CHECKSUM_CHUNK_SIZE):
+        chunk = numpy.frombuffer(
+            data[start:start + CHECKSUM_CHUNK_SIZE], dtype=numpy.uint8)
+        result += int(chunk.sum(dtype=numpy.uint64))
+    return result
+
+def build_header(cart_type: int, checksum: int) -> bytes:
+    '''Builds a 16-byte .car header for the given type and data checksum.'''
+    return CART_HEADER_FORMAT.pack(CART_PREAMBLE.encode('latin-1'), cart_type,
+                                   checksum & CHECKSUM_FIELD_MASK)
+
+def compute_file_checksum(file: pathlib.Path, offset: int = IMAGE_OFFSET) -> int:
+    '''Computes the .car checksum for a file's data, from offset onwards.
+
+    The file is read in CHECKSUM_CHUNK_SIZE chunks, into a single reused
+    buffer, so memory use is constant regardless of the size of the image.
+    '''
+    buffer = bytearray(CHECKSUM_CHUNK_SIZE)
+    view = memoryview(buffer)
     result = 0
-    for byte in bytes:
-        result += byte & CHECKSUM_MASK
+    with open(file, 'rb') as cart_file:
+        cart_file.seek(offset)
+        while (count := cart_file.readinto(buffer)) > 0:
+            result += compute_checksum(view[:count])
     return result
 
+def get_bank_size(cart_type: CartridgeType) -> int:
+    '''Returns the bank size, in bytes, of a cartridge type.  Unbanked types
+    of up to 16 KB are treated as a single bank.'''
+    if cart_type.type in BANKED_16K_BOOT_FIRST:
+        return BANK_SIZE_16K
+    size = cart_type.size_kilobytes * BYTES_PER_KILOBYTE
+    if not is_banked_type(cart_type) and size <= BANK_SIZE_16K:
+        return size
+    return BANK_SIZE_8K
+
+def get_bank_status(digest: bytes, size: int) -> str:
+    '''Returns the status of a bank, from its SHA-1 digest and size.'''
+    if digest == get_fill_digest(0xFF, size):
+        return BANK_EMPTY_FF
+    if digest == get_fill_digest(0x00, size):
+        return BANK_EMPTY_00
+    return BANK_FILLED
+
+_fill_digests = {}
+
+def get_fill_digest(fill: int, size: int) -> bytes:
+    '''SHA-1 digest of size bytes of fill; computed once per fill/size.'''
+    if (fill, size) not in _fill_digests:
+        _fill_digests[(fill, size)] = hashlib.sha1(bytes([fill]) * size).digest()
+    return _fill_digests[(fill, size)]
+
+def analyze_banks(image: CartridgeImage) -> BankAnalysis:
+    '''Finds empty and mirrored banks, and repeated or padded (overdumped)
+    data, using NumPy comparisons over the mapped cartridge data.
+
+    Banks are processed in groups, so only small temporary arrays are
+    needed, even for 128 MB images.'''
+    # NOTE: All NumPy views of the image are released when this returns, which
+    # allows the image to be closed.
+    data = numpy.frombuffer(image.data, dtype=numpy.uint8)
+    bank_size = image.bank_size
+    bank_count = len(data) // bank_size
+    analysis = BankAnalysis(bank_size, bank_count, len(data))
+    banks = data[:bank_count * bank_size].reshape(bank_count, bank_size)
+
+    # Empty banks, a group of banks at a time ...
+    group = max(CHECKSUM_CHUNK_SIZE // bank_size, 1)
+    for first in range(0, bank_count, group):
+        block = banks[first:first + group]
+        analysis.empty_ff.extend(
+            (numpy.flatnonzero((block == 0xFF).all(axis=1)) + first).tolist())
+        analysis.empty_00.extend(
+            (numpy.flatnonzero((block == 0x00).all(axis=1)) + first).tolist())
+
+    # ... mirrored (non-empty) banks, found by hash and confirmed by content ...
+    empty = set(analysis.empty_ff) | set(analysis.empty_00)
+    originals = {}
+    for index in range(bank_count):
+        if index in empty:
+            continue
+        original = originals.setdefault(hashlib.sha1(banks[index]).digest(),
+                                        index)
+        if (original != index and
+            numpy.array_equal(banks[index], banks[original])):
+            analysis.mirrors[index] = original
+
+    # ... data that's a repetition of a smaller block (halving, while the two
+    # halves are the same) ...
+    while (analysis.repeat_size > MIN_REPEAT_SIZE and
+           analysis.repeat_size % 2 == 0):
+        half = analysis.repeat_size // 2
+        if not ranges_equal(data, 0, half, half):
+            break
+        analysis.repeat_size = half
+
+    # ... and trailing empty banks.
+    used_banks = bank_count
+    while used_banks > 0 and used_banks - 1 in empty:
+        used_banks -= 1
+    if used_banks < bank_count:
+        analysis.used_size = used_banks * bank_size
+
+    return analysis
+
+def ranges_equal(data: numpy.ndarray, first: int, second: int,
+                 length: int) -> bool:
+    '''Compares two ranges of data, in CHECKSUM_CHUNK_SIZE chunks.'''
+    for offset in range(0, length, CHECKSUM_CHUNK_SIZE):
+        size = min(CHECKSUM_CHUNK_SIZE, length - offset)
+        if not numpy.array_equal(
+            data[first + offset:first + offset + size],
+            data[second + offset:second + offset + size]):
+            return False
+    return True
+
+def is_banked_type(cart_type: CartridgeType) -> bool:
+    return (cart_type.type in BANKED_8K_BOOT_FIRST or
+            cart_type.type in BANKED_8K_BOOT_LAST or
+            cart_type.type in BANKED_16K_BOOT_FIRST)
+
+def get_rom_layout(cart_type: CartridgeType, image_size: int) -> tuple:
+    '''Returns the (bank size, boot bank index, window start, window end) of
+    an 8-bit computer cartridge type, for an image of image_size bytes.'''
+    if cart_type.type in BANKED_8K_BOOT_FIRST:
+        return BANK_SIZE_8K, 0, WINDOW_START_A000, WINDOW_END
+    if cart_type.type in BANKED_8K_BOOT_LAST:
+        return BANK_SIZE_8K, -1, WINDOW_START_A000, WINDOW_END
+    if cart_type.type in BANKED_16K_BOOT_FIRST:
+        return BANK_SIZE_16K, 0, WINDOW_START_8000, WINDOW_END
+    if cart_type.type in LOW_WINDOW_TYPES:
+        return image_size, 0, WINDOW_START_8000, WINDOW_END_LOW
+    # Unbanked; images up to 8 KB are mapped (and mirrored) at $A000
+    window_start = (WINDOW_START_A000 if image_size <= BANK_SIZE_8K
+                    else WINDOW_END + 1 - image_size)
+    return image_size, 0, max(window_start, WINDOW_START_8000), WINDOW_END
+
+def count_bank_register_references(data: numpy.ndarray) -> numpy.ndarray:
+    '''Histogram (by low byte) of absolute-addressed 6502 instructions that
+    reference $D5xx (the cartridge control area) in data.
+
+    The image is scanned in CHECKSUM_CHUNK_SIZE chunks (overlapping by one
+    instruction) so temporary arrays stay small even for huge images.'''
+    counts = numpy.zeros(256, dtype=numpy.int64)
+    opcodes = numpy.array(ABSOLUTE_OPCODES, dtype=numpy.uint8)
+    for start in range(0, max(len(data) - 2, 0), CHECKSUM_CHUNK_SIZE):
+        chunk = data[start:start + CHECKSUM_CHUNK_SIZE + 2]
+        matches = ((chunk[2:] == BANK_REGISTER_PAGE) &
+                   numpy.isin(chunk[:-2], opcodes))
+        counts += numpy.bincount(chunk[1:-1][matches], minlength=256)
+    return counts
+
+def infer_rom_types(file: pathlib.Path) -> list:
+    '''Infers the most likely cartridge types for a headerless ROM image.
+
+    Returns a list of RomCandidate, most likely first; the list is empty if
+    no known cartridge type matches the size of the image.'''
+    size = file.stat().st_size
+    candidates = cart_types_by_size.get(size, [])
+    if not candidates:
+        return []
+
+    with open(file, 'rb') as rom_file:
+        with mmap.mmap(rom_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            scores = score_rom_types(data, candidates,
+                                     file.suffix.lower() == A5200_SUFFIX)
+
+    return sorted((RomCandidate(cart, score)
+                   for cart, score in zip(candidates, scores)),
+                  key=lambda candidate: -candidate.score)
+
+def score_rom_types(data: mmap.mmap, candidates: list,
+                    is_5200_media: bool) -> list:
+    # NOTE: All NumPy views of the mmap are released when this returns, which
+    # allows the mmap to be closed.
+    analysis = RomAnalysis(numpy.frombuffer(data, dtype=numpy.uint8))
+    scores = []
+    for cart in candidates:
+        score = analysis.score(cart)
+        # The file extension hints at the machine the image is for
+        if (cart.machine == Machine.ATARI_5200) != is_5200_media:
+            score *= MACHINE_MISMATCH_PENALTY
+        scores.append(score)
+    return scores
+
 @click.group()
 @click.version_option('0.1.1.0')
 def cart():
@@ -280,18 +798,25 @@ def list_types():
     help='Output in CSV format')
 @click.option('-h', '--header', is_flag=True, default=False,
     help='Output a header if in CSV format')
+@click.option('-f', '--fast', is_flag=True, default=False,
+    help='Verify header and file size only; skip the data checksum')
 @click.option('-r', '--recurse', is_flag=True, default=False,
     help='Process directories recursively for .car files')
 @click.option('-v', '--verbose', is_flag=True, default=False,
     help='Verbose output')
 @click.argument('source_path', 
     type=click.Path(exists=True, file_okay=True, dir_okay=True))
-def id(csv: bool, header: bool, recurse: bool, verbose: bool, source_path: str):
+def id(csv: bool, header: bool, fast: bool, recurse: bool, verbose: bool,
+       source_path: str):
     '''Identifies the cartridge type and verifies header and data.
 
     \b
       SOURCE_PATH may be a directory or a file; if a directory *only* .car files
       will be processed.  The -r/--recurse option will include subdirectories.
+
+    \b
+      The -f/--fast option reads ONLY the 16-byte header of each file, checking
+      the signature, type and file size, but not the data checksum.
     '''
     files = build_source_file_list(source_path, recurse)
     if files is None:    
@@ -305,12 +830,239 @@ def id(csv: bool, header: bool, recurse: bool, verbose: bool, source_path: str):
         else:
             print(f'Signature,Type,Checksum,Actual Checksum,Is Valid')
     
+    failures = 0
     for file in files:
-        id_cartridge(file, csv, verbose)
+        if not id_cartridge(file, csv, verbose, fast):
+            failures += 1
     
+    exit(ERROR if failures else SUCCESS)
+
+@cart.command('infer')
+@click.option('-c', '--csv', is_flag=True, default=False,
+    help='Output in CSV format')
+@click.option('-h', '--header', is_flag=True, default=False,
+    help='Output a header if in CSV format')
+@click.option('-n', '--candidates', default=3, show_default=True,
+    type=click.IntRange(1), help='Maximum number of candidates to show')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for ROM files')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def infer(csv: bool, header: bool, candidates: int, recurse: bool,
+          source_path: str):
+    '''Infers the cartridge type of headerless ROM images.
+
+    \b
+      SOURCE_PATH may be a directory or a file; if a directory *only* .rom,
+      .bin and .a52 files will be processed.  The -r/--recurse option will
+      include subdirectories.
+
+    \b
+      Candidate types are those matching the image size, ranked by a score
+      derived from each bank's init/run vectors and the bank-switching code
+      found in the image.
+    '''
+    files = build_source_file_list(source_path, recurse, ROM_PATTERNS)
+    if not files:    
+        print(f'No files to identify.')
+        exit(SUCCESS)
+
+    if csv and header:
+        print(f'Rank,Type,Score,Description,File')
+
+    for file in files:
+        infer_rom(file, csv, candidates)
+
     exit(SUCCESS)
 
-def build_source_file_list(source_path: str, recurse: bool) -> list:
+@cart.command('strip')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing ROM files')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .car files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def strip(overwrite: bool, recurse: bool, verbose: bool, source_path: str):
+    '''Converts .car files to headerless ROM images, by removing the header.
+
+    \b
+      SOURCE_PATH may be a directory or a file; if a directory *only* .car files
+      will be processed.  The -r/--recurse option will include subdirectories.
+
+    \b
+      Each ROM image is written alongside its .car file, as .a52 for 5200
+      cartridges and .rom otherwise.
+    '''
+    files = build_source_file_list(source_path, recurse)
+    if not files:    
+        print(f'No files to convert.')
+        exit(SUCCESS)
+
+    failures = 0
+    for file in files:
+        if not strip_cartridge(file, overwrite, verbose):
+            failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+@cart.command('wrap')
+@click.option('-t', '--type', 'cart_type', required=True,
+    type=click.IntRange(FIRST_CARTRIDGE_TYPE, LAST_CARTRIDGE_TYPE),
+    help='Cartridge type (see list_types)')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+    help='Overwrite existing .car files')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for ROM files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def wrap(cart_type: int, overwrite: bool, recurse: bool, verbose: bool,
+         source_path: str):
+    '''Converts headerless ROM images to .car files, by adding a header.
+
+    \b
+      SOURCE_PATH may be a directory or a file; if a directory *only* .rom,
+      .bin and .a52 files will be processed.  The -r/--recurse option will
+      include subdirectories.
+
+    \b
+      Each .car file is written alongside its ROM image; the ROM size must
+      match the size of the cartridge type.
+    '''
+    files = build_source_file_list(source_path, recurse, ROM_PATTERNS)
+    if not files:    
+        print(f'No files to convert.')
+        exit(SUCCESS)
+
+    failures = 0
+    for file in files:
+        if not wrap_rom(file, cart_types[cart_type], overwrite, verbose):
+            failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+@cart.command('banks')
+@click.option('-c', '--csv', is_flag=True, default=False,
+    help='Output in CSV format')
+@click.option('-h', '--header', is_flag=True, default=False,
+    help='Output a header if in CSV format')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .car files')
+@click.option('-x', '--extract', 'extract_path', default=None,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    help='Also write each bank to a file in this directory')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def banks(csv: bool, header: bool, recurse: bool, extract_path: str,
+          source_path: str):
+    '''Lists the banks of cartridges, with a SHA-1 hash and status for each.
+
+    \b
+      SOURCE_PATH may be a directory or a file; if a directory *only* .car files
+      will be processed.  The -r/--recurse option will include subdirectories.
+
+    \b
+      Banks are 8 KB or 16 KB, depending on the cartridge type; unbanked
+      cartridges of up to 16 KB are a single bank.  Empty banks are those
+      entirely filled with $FF or $00.
+    '''
+    files = build_source_file_list(source_path, recurse)
+    if not files:    
+        print(f'No files to process.')
+        exit(SUCCESS)
+
+    if csv and header:
+        print(f'Bank,Offset,Size,SHA-1,Status,File')
+
+    failures = 0
+    for file in files:
+        if not list_banks(file, csv, extract_path):
+            failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+@cart.command('fix')
+@click.option('-n', '--dry-run', is_flag=True, default=False,
+    help='Report what would be fixed, without writing anything')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .car files')
+@click.option('-v', '--verbose', is_flag=True, default=False,
+    help='Verbose output')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def fix(dry_run: bool, recurse: bool, verbose: bool, source_path: str):
+    '''Repairs header checksums that don't match the cartridge data.
+
+    \b
+      SOURCE_PATH may be a directory or a file; if a directory *only* .car files
+      will be processed.  The -r/--recurse option will include subdirectories.
+
+    \b
+      Only the 4-byte checksum field of each mismatched header is rewritten;
+      the rest of the file is left untouched.
+    '''
+    files = build_source_file_list(source_path, recurse)
+    if not files:    
+        print(f'No files to fix.')
+        exit(SUCCESS)
+
+    fixed = 0
+    failures = 0
+    for file in files:
+        result = fix_checksum(file, dry_run, verbose)
+        if result is None:
+            failures += 1
+        elif result:
+            fixed += 1
+
+    action = 'Would fix' if dry_run else 'Fixed'
+    bytes_written = 0 if dry_run else fixed * CHECKSUM_LENGTH
+    print(f'{action} {fixed} of {len(files)} file(s); '
+          f'{bytes_written} byte(s) written.')
+    exit(ERROR if failures else SUCCESS)
+
+@cart.command('analyze')
+@click.option('-c', '--csv', is_flag=True, default=False,
+    help='Output in CSV format')
+@click.option('-h', '--header', is_flag=True, default=False,
+    help='Output a header if in CSV format')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Process directories recursively for .car files')
+@click.argument('source_path', 
+    type=click.Path(exists=True, file_okay=True, dir_okay=True))
+def analyze(csv: bool, header: bool, recurse: bool, source_path: str):
+    '''Finds empty and mirrored banks, and overdumped cartridge data.
+
+    \b
+      SOURCE_PATH may be a directory or a file; if a directory *only* .car files
+      will be processed.  The -r/--recurse option will include subdirectories.
+
+    \b
+      Empty banks are those entirely filled with $FF or $00; mirrored banks
+      are copies of an earlier bank.  Data that repeats, or ends in empty
+      banks, is overdumped; the types matching its trimmed size are listed.
+    '''
+    files = build_source_file_list(source_path, recurse)
+    if not files:    
+        print(f'No files to analyze.')
+        exit(SUCCESS)
+
+    if csv and header:
+        print(f'Type,Banks,Bank Size,Empty $FF,Empty $00,Mirrored,'
+              f'Effective Size,Candidate Types,File')
+
+    failures = 0
+    for file in files:
+        if not analyze_cartridge(file, csv):
+            failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+def build_source_file_list(source_path: str, recurse: bool,
+                           patterns: list = CART_PATTERNS) -> list:
     # We can work on a single file, or a directory (with optional recursion),
     # so build a list of file(s) accordingly
     source_path = pathlib.Path(source_path)
@@ -319,17 +1071,28 @@ def build_source_file_list(source_path: str, recurse: bool) -> list:
         files = []
         files.append(source_path)
     elif source_path.is_dir():
-        pattern = CART_PATTERN_RECR if recurse else CART_PATTERN      
-        files = list(source_path.glob(pattern))
+        prefix = RECURSE_PATTERN_PREFIX if recurse else ''
+        files = [file for pattern in patterns
+                 for file in source_path.glob(prefix + pattern)]
         files.sort(key=lambda x: x.name.lower())
             
     return files
 
-def id_cartridge(file: pathlib.Path, csv: bool, verbose: bool):
-    # Get the cartridge header and validate it
-    data = file.read_bytes()
-    header = CartridgeHeader(data)
-    actual_checksum = compute_checksum(data[CART_HEADER_SIZE:])
+def id_cartridge(file: pathlib.Path, csv: bool, verbose: bool,
+                 fast: bool = False) -> bool:
+    # Get the cartridge header and validate it; only the header is read into
+    # memory, the checksum is streamed (once) from the rest of the file, and
+    # only if we're not in "fast" mode.  Files too short to have a header, or
+    # that can't be read, are reported, and the rest are still processed.
+    # (Invalid headers skip the checksum during validation, but it's still
+    # reported, so it's read here too.)
+    try:
+        header = CartridgeHeader.from_file(file, verify_checksum=not fast)
+        is_valid = header.is_valid
+        checksum = header.actual_checksum
+    except (OSError, ValueError) as error:
+        print(f'{ERROR_TEXT}{file}: {error}')
+        return False
 
     # Setup output formatting
     sep, quote = (CSV_SEPARATOR, CSV_QUOTE) if csv else (SEPARATOR, QUOTE)
@@ -337,12 +1100,15 @@ def id_cartridge(file: pathlib.Path, csv: bool, verbose: bool):
                            else (SIG_START, SIG_END))
     cart_type_width = CSV_TYPE_WIDTH if csv else TYPE_WIDTH
     cart_description_width = CSV_DESCRIPTION_WIDTH if csv else DESCRIPTION_WIDTH
+    checksum_width = 0 if csv else CHECKSUM_WIDTH
+    actual_checksum = (NOT_COMPUTED if checksum is None
+                       else f'0x{checksum:08x}')
     
     # Build the base output ...    
     item = (f'{sig_start}{header.signature}{sig_end}{sep}'
             f'{header.type:{cart_type_width}}{sep}0x{header.checksum:08x}{sep}'
-            f'0x{actual_checksum:08x}{sep}'            
-            f'{header.is_valid}{sep}'
+            f'{actual_checksum:{checksum_width}}{sep}'            
+            f'{is_valid}{sep}'
             f'{quote}{header.description:{cart_description_width}}{quote}')
     
     # ... and add the verbose elements if requested
@@ -351,6 +1117,207 @@ def id_cartridge(file: pathlib.Path, csv: bool, verbose: bool):
                  f'{quote}{str(file)}{quote}')              
     
     print(item)
+    return True
+
+def infer_rom(file: pathlib.Path, csv: bool, candidates: int):
+    ranked = infer_rom_types(file)[:candidates]
+
+    if csv:
+        for rank, candidate in enumerate(ranked, 1):
+            print(f'{rank}{CSV_SEPARATOR}{candidate.cart_type.type}'
+                  f'{CSV_SEPARATOR}{candidate.score:.0%}{CSV_SEPARATOR}'
+                  f'{CSV_QUOTE}{candidate.cart_type.description}{CSV_QUOTE}'
+                  f'{CSV_SEPARATOR}{CSV_QUOTE}{str(file)}{CSV_QUOTE}')
+        return
+
+    print(f'{file}:')
+    if not ranked:
+        print(f'    {NO_MATCHING_TYPES}')
+    for rank, candidate in enumerate(ranked, 1):
+        print(f'    {rank}.{SEPARATOR}{candidate.cart_type.type:{TYPE_WIDTH}}'
+              f'{SEPARATOR}{candidate.score:4.0%}{SEPARATOR}'
+              f'{candidate.cart_type.description}')
+
+def strip_cartridge(file: pathlib.Path, overwrite: bool, verbose: bool) -> bool:
+    '''Writes the data of a .car file, without its header, to a ROM image.'''
+    source_fd = os.open(file, os.O_RDONLY)
+    try:
+        data = os.pread(source_fd, CART_HEADER_SIZE, 0)
+        if len(data) < CART_HEADER_SIZE:
+            print(f'{ERROR_TEXT}{file}: {INVALID_HEADER_SIZE}: '
+                  f'{CART_HEADER_SIZE} bytes, got: {len(data)}')
+            return False
+        header = CartridgeHeader(data, file=file, verify_checksum=False)
+        if header.signature != CART_PREAMBLE:
+            print(f'{ERROR_TEXT}{file}: {INVALID_SIGNATURE}')
+            return False
+
+        is_5200 = (header.type in cart_types and
+                   cart_types[header.type].machine == Machine.ATARI_5200)
+        target = file.with_suffix(A5200_SUFFIX if is_5200 else ROM_SUFFIX)
+        size = os.fstat(source_fd).st_size - CART_HEADER_SIZE
+        if not fileops.copy_to_new_file(source_fd, target, b'',
+                                        CART_HEADER_SIZE, size, overwrite):
+            return False
+    finally:
+        os.close(source_fd)
+
+    if verbose:
+        print(f'{file}: {STRIPPED} {target}')
+    return True
+
+def wrap_rom(file: pathlib.Path, cart_type: CartridgeType, overwrite: bool,
+             verbose: bool) -> bool:
+    '''Writes a ROM image, with a .car header prepended, to a .car file.'''
+    size = file.stat().st_size
+    if size != cart_type.size_kilobytes * BYTES_PER_KILOBYTE:
+        print(f'{ERROR_TEXT}{file}: {ROM_SIZE_MISMATCH} {cart_type.type} '
+              f'({cart_type.size_kilobytes:,} KB)')
+        return False
+
+    header = build_header(cart_type.type, compute_file_checksum(file, 0))
+    target = file.with_suffix(CART_SUFFIX)
+    source_fd = os.open(file, os.O_RDONLY)
+    try:
+        if not fileops.copy_to_new_file(source_fd, target, header, 0, size,
+                                        overwrite):
+            return False
+    finally:
+        os.close(source_fd)
+
+    if verbose:
+        print(f'{file}: {WRAPPED} {target}')
+    return True
+
+def list_banks(file: pathlib.Path, csv: bool, extract_path: str) -> bool:
+    try:
+        image = CartridgeImage(file)
+    except ValueError as error:
+        print(f'{ERROR_TEXT}{file}: {error}')
+        return False
+
+    with image:
+        header = image.header
+        if header.signature != CART_PREAMBLE or header.type not in cart_types:
+            print(f'{ERROR_TEXT}{file}: {header.invalid_reason}')
+            return False
+
+        if not csv:
+            print(f'{file}: Type {header.type}{SEPARATOR}{header.description}'
+                  f'{SEPARATOR}{image.bank_count} x '
+                  f'{image.bank_size // BYTES_PER_KILOBYTE} KB banks')
+
+        for index, bank in enumerate(image.banks()):
+            offset = IMAGE_OFFSET + index * image.bank_size
+            digest = hashlib.sha1(bank).digest()
+            status = get_bank_status(digest, len(bank))
+            if csv:
+                print(f'{index}{CSV_SEPARATOR}0x{offset:08x}{CSV_SEPARATOR}'
+                      f'{len(bank)}{CSV_SEPARATOR}{digest.hex()}'
+                      f'{CSV_SEPARATOR}{status}{CSV_SEPARATOR}'
+                      f'{CSV_QUOTE}{str(file)}{CSV_QUOTE}')
+            else:
+                print(f'    {index:4}{SEPARATOR}0x{offset:08x}{SEPARATOR}'
+                      f'{digest.hex()}{SEPARATOR}{status}')
+
+            if extract_path is not None:
+                extract_bank(bank, pathlib.Path(extract_path) /
+                             f'{file.stem}_bank_{index:04d}{BANK_FILE_SUFFIX}')
+
+    return True
+
+def extract_bank(bank: memoryview, target: pathlib.Path):
+    '''Writes a bank, straight from its view of the mapped file.'''
+    target_fd = fileops.create_file(target, overwrite=True)
+    try:
+        fileops.write_all(target_fd, bank)
+    finally:
+        os.close(target_fd)
+
+def fix_checksum(file: pathlib.Path, dry_run: bool, verbose: bool) -> bool:
+    '''Rewrites the header checksum of a .car file, in place, if it doesn't
+    match the data; returns True if it was (or would be) fixed, False if it
+    was already correct, and None if the file isn't a valid .car file, or
+    can't be read or written.
+
+    Only the checksum is fixed; files that are invalid for any other reason
+    (signature, type or size) are reported, and left alone.'''
+    try:
+        header = CartridgeHeader.from_file(file)
+        reason = header.invalid_reason
+        if reason not in (VALID, INVALID_CHECKSUM):
+            print(f'{ERROR_TEXT}{file}: {reason}')
+            return None
+
+        checksum = header.actual_checksum & CHECKSUM_FIELD_MASK
+        if header.checksum == checksum:
+            if verbose:
+                print(f'{file}: {CHECKSUM_OK}')
+            return False
+
+        if not dry_run:
+            fd = os.open(file, os.O_WRONLY)
+            try:
+                os.pwrite(fd, CHECKSUM_FORMAT.pack(checksum), CHECKSUM_OFFSET)
+            finally:
+                os.close(fd)
+    except (OSError, ValueError) as error:
+        print(f'{ERROR_TEXT}{file}: {error}')
+        return None
+
+    if verbose:
+        print(f'{file}: {CHECKSUM_TO_FIX if dry_run else CHECKSUM_FIXED} '
+              f'(0x{header.checksum:08x} -> 0x{checksum:08x})')
+    return True
+
+def analyze_cartridge(file: pathlib.Path, csv: bool) -> bool:
+    try:
+        image = CartridgeImage(file)
+    except ValueError as error:
+        print(f'{ERROR_TEXT}{file}: {error}')
+        return False
+
+    with image:
+        header = image.header
+        if header.signature != CART_PREAMBLE or header.type not in cart_types:
+            print(f'{ERROR_TEXT}{file}: {header.invalid_reason}')
+            return False
+        analysis = analyze_banks(image)
+
+    # Types the data could be trimmed to, for the same machine
+    machine = cart_types[header.type].machine
+    candidates = ([cart for cart
+                   in cart_types_by_size.get(analysis.effective_size, [])
+                   if cart.machine == machine]
+                  if analysis.is_overdumped else [])
+
+    if csv:
+        print(f'{header.type}{CSV_SEPARATOR}{analysis.bank_count}'
+              f'{CSV_SEPARATOR}{analysis.bank_size}{CSV_SEPARATOR}'
+              f'{len(analysis.empty_ff)}{CSV_SEPARATOR}'
+              f'{len(analysis.empty_00)}{CSV_SEPARATOR}'
+              f'{len(analysis.mirrors)}{CSV_SEPARATOR}'
+              f'{analysis.effective_size}{CSV_SEPARATOR}{CSV_QUOTE}'
+              f'{" ".join(str(cart.type) for cart in candidates)}{CSV_QUOTE}'
+              f'{CSV_SEPARATOR}{CSV_QUOTE}{str(file)}{CSV_QUOTE}')
+        return True
+
+    print(f'{file}: Type {header.type}{SEPARATOR}{header.description}'
+          f'{SEPARATOR}{analysis.bank_count} x '
+          f'{analysis.bank_size // BYTES_PER_KILOBYTE} KB banks')
+    print(f'    Empty banks: {len(analysis.empty_ff)} x $FF, '
+          f'{len(analysis.empty_00)} x $00{SEPARATOR}Mirrored banks: '
+          f'{len(analysis.mirrors)}')
+    if analysis.mirrors:
+        print('    Mirrors: ' + ', '.join(
+            f'{bank}={original}' for bank, original in analysis.mirrors.items()))
+    if analysis.is_overdumped:
+        print(f'    Overdumped: only {analysis.effective_size:,} of '
+              f'{analysis.data_size:,} bytes are unique')
+        for cart in candidates:
+            print(f'        {cart.type:{TYPE_WIDTH}}{SEPARATOR}'
+                  f'{cart.description}')
+    return True
 
 # Run!
 if __name__ == '__main__':
@@ -7,12 +7,22 @@
 # License: https://github.com/idunmore/AtariTools/blob/master/LICENSE
 
 # Native Python Modules
+import csv
+import json
+import os
 import pathlib
-import shutil
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Self
 
 # 3rd Party/External Modules
 import click
 
+# Local Application Modules
+import cartridge
+import fileops
+
 # Constants
 
 # Error Messages and Command Result Exit Codes
@@ -39,12 +49,48 @@ CFG_EXTENSION = 'cfg'
 
 EOL = ';'
 KEY_VALUE_SEPARATOR = '='
+LINE_ENDINGS = '\r\n'
+DEFAULT_LINE_ENDING = '\n'
+
+# Audit Reference and Result Statuses
+REFERENCE_DEFAULTS = 'defaults'
+AUDIT_DRIFT = 'drift'
+AUDIT_NO_CFG = 'no_cfg'
+AUDIT_ERROR = 'error'
+
+# Export/Import Table; values are exported without their quotes, which are
+# restored on import.
+TABLE_FILE_COLUMN = 'file'
+VALUE_QUOTE = '"'
+UNQUOTED_VALUES = ('true', 'false')
+
+# Template Placeholders, replaced when a .cfg file is applied: the game
+# (media file) name and the name of the folder it's in.
+PLACEHOLDER_GAME = 'game'
+PLACEHOLDER_FOLDER = 'folder'
+PLACEHOLDER_PATTERN = re.compile(
+    f'{{({PLACEHOLDER_GAME}|{PLACEHOLDER_FOLDER})}}')
+
+# .cfg files and templates are read, and written, as UTF-8; any bytes that
+# aren't valid UTF-8 are kept as they are.
+CONFIG_ENCODING = 'utf-8'
+CONFIG_ERRORS = 'surrogateescape'
 
 # Atari Media File Extensions
 MEDIA_EXTENSIONS = ['atr', 'atx', 'xfd', 'dcm', 'com', 'exe', 'xex', 'cas',
                     'car', 'crt', 'rom', 'bin', 'a52', 'm3u']
 FIRST_CARTRIDGE_TYPE = 1
 LAST_CARTRIDGE_TYPE = 70
+A5200_EXTENSION = 'a52'
+CAR_EXTENSION = 'car'
+CARTRIDGE_EXTENSION_PREFIX = 'c'
+
+# Generation Rule Tags, matched (case-insensitively) in media file names
+BASIC_TAG_PATTERN = re.compile(r'-basic(?![a-z])', re.IGNORECASE)
+PAL_TAG_PATTERN = re.compile(r'(?<![a-z])pal(?![a-z])', re.IGNORECASE)
+MODEL_5200 = '5200'
+VIDEO_NTSC = 'NTSC'
+VIDEO_PAL = 'PAL'
 
 # Emulator Keys & Defaults
 KEY_EMULATOR_PREFIX = 'emulator_'
@@ -145,7 +191,14 @@ def create(filename, model: str, basic: bool, video_std: str, force_pal: bool,
 @click.argument('dest_path', type=click.Path(exists=True, dir_okay=True))
 def apply(overwrite: bool, recurse: bool, verbosity: str,
           config_file: str, dest_path: str):
-    '''Applies specified .cfg file to THE400 Mini USB Media games.'''
+    '''Applies specified .cfg file to THE400 Mini USB Media games.
+
+    \b
+    {game} and {folder}, in the .cfg file, are replaced with the name of each
+    game (its media file name, without the extension) and of its folder.
+    '''
+    # Load the config file, ONCE:
+    config_file = ConfigTemplate.from_file(pathlib.Path(config_file))
     extensions = get_extensions()
     target_files = build_target_file_list(pathlib.Path(dest_path), extensions,
                                           recurse)
@@ -171,7 +224,7 @@ def apply(overwrite: bool, recurse: bool, verbosity: str,
 def update(recurse: bool, verbosity: str, update_file: str, dest_path: str):
     '''Updates .cfg files with settings from specified update file.'''
     # Load the update file, ONCE:
-    update_file_data = load_config_data(pathlib.Path(update_file))
+    update_file_data = Configuration.from_file(pathlib.Path(update_file))
 
     # Our target files are all files with the .cfg extension    
     extensions = [CFG_EXTENSION]
@@ -185,12 +238,313 @@ def update(recurse: bool, verbosity: str, update_file: str, dest_path: str):
                 update_config_file(update_file_data, target_file)        
     else:
         for target_file in target_files:
-            update_config_file(update_file_data, target_file)
-            echo_v(f'Updated: {target_file} with: {update_file}',
-                   int(verbosity))      
+            if update_config_file(update_file_data, target_file):
+                echo_v(f'Updated: {target_file} with: {update_file}',
+                       int(verbosity))      
+
+    exit(SUCCESS)
+
+@config.command()
+@click.option('-m', '--model', default=DEFAULT_MACHINE, show_default=True,
+	type=click.Choice(['400', '800', 'XL', 'XE', '5200']),
+	help='Atari 8-bit Model for games no model rule applies to')
+@click.option('-a', '--artefact', default='0', show_default=True,
+	type=click.Choice(['0','1','2','3']), help="Artefacting mode")
+@click.option('-s', '--start', default=DEFAULT_DISPLAY_START, show_default=True,
+	help='Display Start scanline (lower values start higher on screen)')
+@click.option('-h', '--height', default=DEFAULT_DISPLAY_HEIGHT,
+    show_default=True, help='Display Height (scanlines)')
+@click.option('-w', '--width', default=DEFAULT_DISPLAY_WIDTH, show_default=True,
+	help='Display Width (pixels)')
+@click.option('-o', '--overwrite', is_flag=True, default=False,
+        help='Overwrite existing .cfg files')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Recursively process all files in target directory')
+@click.option('-v', '--verbosity', type=click.Choice(['0', '1', '2']),
+    default='1', show_default=True, help='Status/progress reporting verbosity')
+@click.argument('dest_path', type=click.Path(exists=True, dir_okay=True))
+def generate(model: str, artefact: str, start: int, height: int, width: int,
+             overwrite: bool, recurse: bool, verbosity: str, dest_path: str):
+    '''Generates .cfg files for THE400 Mini USB Media games, using rules.
+
+    \b
+    Each game's settings are derived from its media file:
+      .a52 files, and 5200 cartridges (.car or .cNN), use the 5200 model
+      (and its controller mappings);
+      names tagged "-basic" enable BASIC;
+      names tagged "PAL" use the PAL video standard.
+    '''
+    # Media files are found in a single pass; listed first, so the progress
+    # bar knows how many there are.
+    media_files = sorted(find_media_files(pathlib.Path(dest_path),
+                                          get_extensions(), recurse))
+    # Each distinct set of settings is built, and encoded, only once
+    configs = {}
+
+    if int(verbosity) == PROGRESS:
+        # ... showing a progress bar.
+        with click.progressbar(media_files,
+                               label='Generating config') as bar:
+            for file in bar:
+                generate_config(file, configs, model, artefact, start, height,
+                                width, overwrite, verbosity)
+    else:
+        for file in media_files:
+            generate_config(file, configs, model, artefact, start, height,
+                            width, overwrite, verbosity)
 
     exit(SUCCESS)
 
+@config.command()
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=None,
+    help='Worker threads parsing .cfg files [default: based on CPU count]')
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Recursively process all files in target directory')
+@click.argument('reference')
+@click.argument('dest_path', type=click.Path(exists=True, dir_okay=True))
+def audit(jobs: int, recurse: bool, reference: str, dest_path: str):
+    '''Audits .cfg files against a reference .cfg file, or the defaults.
+
+    \b
+    REFERENCE is a .cfg file, or "defaults" for the settings create uses by
+    default.  One JSON object is written per line, for each .cfg file with
+    missing, extra or different keys, each media file without a .cfg file
+    and each .cfg file that can't be read; nothing for consistent files.
+    '''
+    if reference == REFERENCE_DEFAULTS:
+        reference_config = Configuration(build_config(
+            DEFAULT_MACHINE, False, VIDEO_NTSC, False, DEFAULT_ARTEFACT,
+            DEFAULT_DISPLAY_START, DEFAULT_DISPLAY_HEIGHT,
+            DEFAULT_DISPLAY_WIDTH))
+    else:
+        try:
+            reference_config = Configuration.from_file(pathlib.Path(reference))
+        except (OSError, UnicodeDecodeError) as e:
+            click.echo(f'{ERROR_TEXT}{reference}: {e}', err=True)
+            exit(ERROR)
+    reference_values = get_config_values(reference_config)
+
+    # One pass over the tree finds both the .cfg files and the media files
+    config_files, media_files = find_config_and_media_files(
+        pathlib.Path(dest_path), recurse)
+
+    failures = 0
+    for media_file in media_files:
+        if media_file.with_suffix(CFG_SUFFIX) not in config_files:
+            click.echo(json.dumps({'file': str(media_file),
+                                   'status': AUDIT_NO_CFG}))
+            failures += 1
+
+    # Files are parsed by the workers; results are written in file order, as
+    # soon as each is ready.
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for result in executor.map(
+                lambda file: audit_config_file(file, reference_values),
+                sorted(config_files.values())):
+            if result is not None:
+                click.echo(json.dumps(result))
+                failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+@config.command()
+@click.option('-r', '--recurse', is_flag=True, default=False,
+    help='Recursively process all files in target directory')
+@click.argument('dest_path', type=click.Path(exists=True, dir_okay=True))
+def export(recurse: bool, dest_path: str):
+    '''Exports .cfg file settings as a CSV table, to stdout.
+
+    \b
+    One row is written per .cfg file, with its path (relative to DEST_PATH)
+    and one column per setting; values are written without their quotes.
+    Edit the table, e.g. in a spreadsheet, and write it back with import.
+    '''
+    dest_path = pathlib.Path(dest_path)
+    base_path = dest_path if dest_path.is_dir() else dest_path.parent
+    rows = []
+    # Keys in the order they're first seen, so the columns follow the files
+    columns = {TABLE_FILE_COLUMN: None}
+    failures = 0
+    # Rows are sorted by path, so tables from the same tree are the same
+    for file in sorted(find_media_files(dest_path, [CFG_EXTENSION], recurse)):
+        try:
+            values = get_config_values(Configuration.from_file(file))
+        except (OSError, UnicodeDecodeError) as e:
+            click.echo(f'{ERROR_TEXT}{file}: {e}', err=True)
+            failures += 1
+            continue
+        row = {TABLE_FILE_COLUMN: file.relative_to(base_path).as_posix()}
+        row.update((key, unquote_config_value(value))
+                   for key, value in values.items())
+        columns.update(dict.fromkeys(row))
+        rows.append(row)
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(columns))
+    writer.writeheader()
+    writer.writerows(rows)
+    exit(ERROR if failures else SUCCESS)
+
+@config.command(name='import')
+@click.option('-v', '--verbosity', type=click.Choice(['0', '1', '2']),
+    default='1', show_default=True, help='Status/progress reporting verbosity')
+@click.argument('table', type=click.Path(exists=True, dir_okay=False))
+@click.argument('dest_path', type=click.Path(exists=True, file_okay=False),
+                default='.')
+def import_table(verbosity: str, table: str, dest_path: str):
+    '''Imports .cfg file settings from a CSV table, written by export.
+
+    \b
+    Paths in the table are relative to DEST_PATH (default: the current
+    directory).  Empty cells are ignored, values that were quoted are quoted
+    again, and only files whose settings changed are written.
+    '''
+    dest_path = pathlib.Path(dest_path)
+    failures = 0
+    with open(table, 'r', newline='') as table_file:
+        reader = csv.DictReader(table_file)
+        if not reader.fieldnames or TABLE_FILE_COLUMN not in reader.fieldnames:
+            click.echo(f'{ERROR_TEXT}{table}: no "{TABLE_FILE_COLUMN}" column',
+                       err=True)
+            exit(ERROR)
+
+        for row in reader:
+            target_file = dest_path / row.pop(TABLE_FILE_COLUMN)
+            try:
+                if import_config_row(row, target_file):
+                    echo_v(f'Updated: {target_file} from: {table}',
+                           int(verbosity))
+            except (OSError, UnicodeDecodeError) as e:
+                click.echo(f'{ERROR_TEXT}{target_file}: {e}', err=True)
+                failures += 1
+
+    exit(ERROR if failures else SUCCESS)
+
+# Configuration Model
+
+class Configuration:
+    '''The lines of a .cfg file, in order and exactly as read (including
+    their line endings), indexed by the key of the first line with each key.
+
+    Lines without a key/value separator (e.g. comments) are keyed by their
+    whole (stripped) text, as get_config_item_key() does.
+    '''
+    __slots__ = ('_lines', '_index')
+
+    def __init__(self: Self, lines: list = ()):
+        self._lines = list(lines)
+        self._index = {}
+        for position, line in enumerate(self._lines):
+            self._index.setdefault(get_config_item_key(line), position)
+
+    @classmethod
+    def from_file(cls, file: pathlib.Path) -> Self:
+        # newline='' leaves line endings untranslated, so files are written
+        # back byte for byte.
+        with open(file, 'r', encoding=CONFIG_ENCODING, errors=CONFIG_ERRORS,
+                  newline='') as config_file:
+            return cls(config_file.read().splitlines(keepends=True))
+
+    @property
+    def lines(self: Self) -> list:
+        '''The lines, with their line endings.'''
+        return self._lines
+
+    def __len__(self: Self) -> int:
+        return len(self._lines)
+
+    def __contains__(self: Self, key: str) -> bool:
+        return key in self._index
+
+    def get(self: Self, key: str) -> str:
+        '''The first line with key (without its line ending), or None.'''
+        position = self._index.get(key)
+        return None if position is None else get_line_text(
+            self._lines[position])
+
+    def items(self: Self):
+        '''(key, line) for the first line with each key, in order.'''
+        return ((key, self._lines[position])
+                for key, position in self._index.items())
+
+    def merge(self: Self, updates: Self) -> bool:
+        '''Replaces the first line with each of the updates' keys with the
+        update's line (keeping this line's ending), or appends it if the key
+        is new; in one pass over the updates.  Returns True if anything
+        changed.'''
+        changed = False
+        for line in updates.lines:
+            key = get_config_item_key(line)
+            text = line.rstrip()
+            position = self._index.get(key)
+            if position is not None:
+                current = self._lines[position]
+                if current.rstrip() != text:
+                    self._lines[position] = text + get_line_ending(current)
+                    changed = True
+            else:
+                self._append(key, text)
+                changed = True
+        return changed
+
+    def to_text(self: Self) -> str:
+        return ''.join(self._lines)
+
+    def _append(self: Self, key: str, text: str):
+        ending = self._line_ending()
+        if self._lines and not get_line_ending(self._lines[-1]):
+            self._lines[-1] += ending
+        self._index[key] = len(self._lines)
+        self._lines.append(text + ending)
+
+    def _line_ending(self: Self) -> str:
+        # New lines use the file's existing line ending
+        for line in self._lines:
+            ending = get_line_ending(line)
+            if ending:
+                return ending
+        return DEFAULT_LINE_ENDING
+
+def get_line_text(line: str) -> str:
+    return line.rstrip(LINE_ENDINGS)
+
+def get_line_ending(line: str) -> str:
+    return line[len(get_line_text(line)):]
+
+class ConfigTemplate:
+    '''A .cfg file to apply, read once and pre-encoded; split (once) around
+    its placeholders, if it has any.'''
+    __slots__ = ('_source', '_parts')
+
+    def __init__(self: Self, text: str, source: pathlib.Path = None):
+        self._source = source
+        # Splitting on the (capturing) pattern alternates literal text and
+        # placeholder names; the literals are encoded now.
+        self._parts = [part if index % 2 else part.encode(CONFIG_ENCODING,
+                                                          CONFIG_ERRORS)
+                       for index, part in enumerate(
+                           PLACEHOLDER_PATTERN.split(text))]
+
+    @classmethod
+    def from_file(cls, file: pathlib.Path) -> Self:
+        return cls(file.read_bytes().decode(CONFIG_ENCODING, CONFIG_ERRORS),
+                   file)
+
+    @property
+    def source(self: Self) -> pathlib.Path:
+        return self._source
+
+    def render(self: Self, target_file: pathlib.Path) -> bytes:
+        '''The template's bytes, for the game whose .cfg is target_file.'''
+        if len(self._parts) == 1:
+            return self._parts[0]
+
+        values = {PLACEHOLDER_GAME: target_file.stem,
+                  PLACEHOLDER_FOLDER: target_file.parent.name}
+        return b''.join(part if isinstance(part, bytes)
+                        else values[part].encode(CONFIG_ENCODING,
+                                                 CONFIG_ERRORS)
+                        for part in self._parts)
+
 # Configuration File Functions
 def build_config(model: str, basic: bool, video_std: str, force_pal: bool,
         artefact: str, start: int, height: int, width:int) -> list:
@@ -253,21 +607,142 @@ def add_controller_mappings(config: list, model: str):
 
 def update_config(config_updates: list, target_config: list):
     '''Updates the specified configuration file with the new settings.'''
-    # Iterate through the new configuration settings   
-    for update_item in config_updates:
-        item_found = False
-        update_key = get_config_item_key(update_item)
-        for target_item in target_config:
-            # Update the existing config item if it exists ...
-            if update_key == get_config_item_key(target_item):               
-                target_config[target_config.index(target_item)] = update_item              
-                item_found = True
-                break           
-        
-        if not item_found:
-            # ... otherwise add the new config item.            
-            target_config.append(update_item)  
-            
+    # Existing items are replaced in place, new ones are added at the end
+    configuration = Configuration(target_config)
+    configuration.merge(Configuration(config_updates))
+    target_config[:] = [get_line_text(line) for line in configuration.lines]
+
+def get_game_settings(media_file: pathlib.Path, model: str) -> tuple:
+    '''Applies the generation rules to a media file; returns its (model,
+    basic, video standard).'''
+    settings = {'model': model, 'basic': False, 'video_std': VIDEO_NTSC}
+    for rule in GENERATION_RULES:
+        rule(media_file, settings)
+    return settings['model'], settings['basic'], settings['video_std']
+
+def apply_5200_rule(media_file: pathlib.Path, settings: dict):
+    if is_5200_media(media_file):
+        settings['model'] = MODEL_5200
+
+def apply_basic_rule(media_file: pathlib.Path, settings: dict):
+    if BASIC_TAG_PATTERN.search(media_file.stem):
+        settings['basic'] = True
+
+def apply_pal_rule(media_file: pathlib.Path, settings: dict):
+    if PAL_TAG_PATTERN.search(media_file.stem):
+        settings['video_std'] = VIDEO_PAL
+
+# Rules are applied in order, so later rules can refine earlier ones
+GENERATION_RULES = (apply_5200_rule, apply_basic_rule, apply_pal_rule)
+
+def is_5200_media(media_file: pathlib.Path) -> bool:
+    '''True for .a52 files, and cartridges whose type is for the 5200; .car
+    files have their type read from the header (a single 16-byte read).'''
+    extension = media_file.suffix[1:].lower()
+    if extension == A5200_EXTENSION:
+        return True
+
+    if extension == CAR_EXTENSION:
+        try:
+            header = cartridge.CartridgeHeader.from_file(
+                media_file, verify_checksum=False)
+        except (OSError, ValueError):
+            return False
+        if not header.is_valid:
+            return False
+        cart_type = header.type
+    elif (extension.startswith(CARTRIDGE_EXTENSION_PREFIX) and
+          extension[1:].isdigit()):
+        cart_type = int(extension[1:])
+    else:
+        return False
+
+    return (cart_type in cartridge.cart_types and
+            cartridge.cart_types[cart_type].machine ==
+            cartridge.Machine.ATARI_5200)
+
+def find_config_and_media_files(dest_path: pathlib.Path,
+                                recurse: bool) -> tuple:
+    '''Finds the .cfg files, and the media files, in a single pass; returns
+    ({.cfg path, with a lower-case suffix: .cfg path}, [media files]).'''
+    extensions = get_extensions()
+    extensions.append(CFG_EXTENSION)
+    config_files = {}
+    media_files = []
+    for file in find_media_files(dest_path, extensions, recurse):
+        if file.suffix[1:].lower() == CFG_EXTENSION:
+            config_files[file.with_suffix(CFG_SUFFIX)] = file
+        else:
+            media_files.append(file)
+    return config_files, media_files
+
+def audit_config_file(config_file: pathlib.Path,
+                      reference_values: dict) -> dict:
+    '''Compares a .cfg file's settings to the reference's; returns the
+    differences (or the reason it couldn't be read), or None if there are
+    none.'''
+    try:
+        values = get_config_values(Configuration.from_file(config_file))
+    except (OSError, UnicodeDecodeError) as e:
+        return {'file': str(config_file), 'status': AUDIT_ERROR,
+                'reason': str(e)}
+
+    missing = [key for key in reference_values if key not in values]
+    extra = [key for key in values if key not in reference_values]
+    different = {key: {'expected': reference_values[key], 'actual': value}
+                 for key, value in values.items()
+                 if key in reference_values and reference_values[key] != value}
+    if not (missing or extra or different):
+        return None
+    return {'file': str(config_file), 'status': AUDIT_DRIFT,
+            'missing': missing, 'extra': extra, 'different': different}
+
+def get_config_values(configuration: Configuration) -> dict:
+    '''The value of each setting (key/value line); other lines are
+    ignored.'''
+    return {key: get_config_item_value(line)
+            for key, line in configuration.items()
+            if KEY_VALUE_SEPARATOR in line}
+
+def get_config_item_value(config_item: str) -> str:
+    '''Extracts the value from a configuration line item, without the
+    terminating semicolon.'''
+    value = config_item.split(KEY_VALUE_SEPARATOR, 1)[1].strip()
+    return value[:-len(EOL)].rstrip() if value.endswith(EOL) else value
+
+def unquote_config_value(value: str) -> str:
+    if len(value) > 1 and value[0] == VALUE_QUOTE and value[-1] == VALUE_QUOTE:
+        return value[1:-1]
+    return value
+
+def import_config_row(row: dict, target_file: pathlib.Path) -> bool:
+    '''Updates a .cfg file with a table row's (non-empty) values; returns True
+    if the file changed (it's only written if it did).'''
+    target_config = Configuration.from_file(target_file)
+    values = get_config_values(target_config)
+    updates = []
+    for key, value in row.items():
+        # Empty cells (and any cells beyond the header's columns) are ignored
+        if key is None or not value:
+            continue
+        current = values.get(key)
+        if current is not None and unquote_config_value(current) == value:
+            continue
+        # Quote the value if the file's was; new settings are quoted unless
+        # they're numbers or booleans, as build_config writes them.
+        if current is not None:
+            quoted = current != unquote_config_value(current)
+        else:
+            quoted = not (value.isdigit() or value in UNQUOTED_VALUES)
+        if quoted:
+            value = f'{VALUE_QUOTE}{value}{VALUE_QUOTE}'
+        updates.append(f'{key} {KEY_VALUE_SEPARATOR} {value}{EOL}')
+
+    if not target_config.merge(Configuration(updates)):
+        return False
+    write_configuration(target_config, target_file)
+    return True
+
 def get_config_item_key(config_item: str) -> str:
     '''Extracts the key from a configuration line item.'''
     return config_item.split(KEY_VALUE_SEPARATOR)[0].strip()
@@ -275,7 +750,7 @@ def get_config_item_key(config_item: str) -> str:
 def get_extensions() -> list:
     '''Returns the list of supported Atari media file extensions.'''
     # Start with the default list of extensions ...
-    extensions = MEDIA_EXTENSIONS
+    extensions = list(MEDIA_EXTENSIONS)
     # ... and add all the specific cartridge extensions:
     for number in range(FIRST_CARTRIDGE_TYPE, LAST_CARTRIDGE_TYPE + 1):
         extensions.append(f'c{number:02d}')
@@ -284,51 +759,92 @@ def get_extensions() -> list:
 
 def build_target_file_list(dest_path: pathlib.Path, extensions: list,
                            recurse: bool = False) -> list:
+    # Add only files with valid extensions, but replacing the extension with
+    # '.cfg'
+    return [file.with_suffix(CFG_SUFFIX)
+            for file in find_media_files(dest_path, extensions, recurse)]
+
+def find_media_files(dest_path: pathlib.Path, extensions: list,
+                     recurse: bool = False) -> Iterator[pathlib.Path]:
+    '''Yields the file, or the files in the directory (optionally recursing),
+    with the given extensions, as they're found.'''
     # Anything files with extensions not in this list are excluded    
-    target_files = []
+    extensions = set(extensions)
     # Single file?
     if dest_path.is_file() and dest_path.suffix[1:].lower() in extensions:
-        # Add file, replacing the extension with '.cfg'
-        target_files.append(dest_path.with_suffix(CFG_SUFFIX))
+        yield dest_path
     
     # Directory?
     if dest_path.is_dir():
         # Recurse if specied ...
         pattern = TARGET_PATTERN_RECR if recurse else TARGET_PATTERN  
-        # ... and find all files ...      
-        candidate_files = list(dest_path.glob(pattern))  
-        # ... adding only those with valid extensions, but replacing the
-        # extension with '.cfg'      
-        target_files = [file.with_suffix(CFG_SUFFIX)
-                        for file in candidate_files
-                        if (file.is_file() and
-                            file.suffix[1:].lower() in extensions)]
-    
-    return target_files
+        # ... and find all files with valid extensions
+        for file in dest_path.glob(pattern):
+            if file.suffix[1:].lower() in extensions and file.is_file():
+                yield file
 
-def apply_config(config_file: str, target_file: pathlib.Path, overwrite: bool,
-                 verbosity: str):
+def apply_config(config_file: str | ConfigTemplate, target_file: pathlib.Path,
+                 overwrite: bool, verbosity: str):
     '''Applies the specified configuration file to the target file.'''
-    if not target_file.exists() or overwrite:
-        shutil.copy(config_file, target_file)
-        echo_v(f'Applied {pathlib.Path(config_file)} to: {target_file}',
-                int(verbosity))
-
-def load_config_data(update_file: pathlib.Path) -> list:
-    '''Loads the specified update file into a list of configuration items.'''    
-    with open(update_file, 'r') as file:
-        lines = [line.rstrip() for line in file]
-    return lines
-
-def update_config_file(update_file: list, target_file: pathlib.Path):
-    '''Updates the specified configuration file with the new settings.'''
-    target_config = load_config_data(target_file)
+    template = (config_file if isinstance(config_file, ConfigTemplate)
+                else ConfigTemplate.from_file(pathlib.Path(config_file)))
+    if write_config_file(target_file, template.render(target_file), overwrite):
+        echo_v(f'Applied {template.source} to: {target_file}', int(verbosity))
+
+def generate_config(media_file: pathlib.Path, configs: dict, model: str,
+                    artefact: str, start: int, height: int, width: int,
+                    overwrite: bool, verbosity: str):
+    '''Writes the .cfg file for a media file, with the settings the rules
+    give it; configs caches the encoded .cfg for each set of settings.'''
+    settings = get_game_settings(media_file, model)
+    game_model, basic, video_std = settings
+    if settings not in configs:
+        lines = build_config(game_model, basic, video_std, False, artefact,
+                             start, height, width)
+        configs[settings] = ''.join(line + DEFAULT_LINE_ENDING
+                                    for line in lines).encode(CONFIG_ENCODING)
+
+    target_file = media_file.with_suffix(CFG_SUFFIX)
+    if write_config_file(target_file, configs[settings], overwrite):
+        basic_value = f'{EMULATOR_SEPARATOR}{BASIC}' if basic else ''
+        echo_v(f'Generated: {target_file} ({game_model}{basic_value}'
+               f' {video_std})', int(verbosity))
+
+def write_config_file(target_file: pathlib.Path, data: bytes,
+                      overwrite: bool) -> bool:
+    '''Writes data to the target file; returns False, without writing, if it
+    exists and overwrite isn't set.'''
+    # Open (failing if it exists, unless overwriting), write and close; the
+    # existence check is part of the open.
+    try:
+        fd = fileops.create_file(target_file, overwrite)
+    except FileExistsError:
+        return False
+    try:
+        fileops.write_all(fd, data)
+    finally:
+        os.close(fd)
+    return True
+
+def update_config_file(updates: Configuration,
+                       target_file: pathlib.Path) -> bool:
+    '''Updates the specified configuration file with the new settings;
+    returns True if the file changed (it's only written if it did).'''
+    target_config = Configuration.from_file(target_file)
     # Update the target file with the new settings
-    update_config(update_file, target_config)
-    # Write the updated target file
-    with open(target_file, 'w') as file:
-        for line in target_config:
-            file.write(line + '\n')
+    if not target_config.merge(updates):
+        return False
+
+    write_configuration(target_config, target_file)
+    return True
+
+def write_configuration(configuration: Configuration,
+                        target_file: pathlib.Path):
+    '''Writes the configuration to the target file, keeping its line
+    endings.'''
+    with open(target_file, 'w', encoding=CONFIG_ENCODING,
+              errors=CONFIG_ERRORS, newline='') as file:
+        file.write(configuration.to_text())
 
 # GENERAL Utility Functions
 
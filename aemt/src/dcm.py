@@ -0,0 +1,173 @@
+#!python3
+
+# dcm.py - DiskComm (.DCM) Compressed Disk Image Decoder
+#
+# Copyright(C) 2026, Ian Michael Dunmore
+#
+# License: https://github.com/idunmore/AtariTools/blob/master/LICENSE
+
+# Native Python Modules
+import struct
+from typing import BinaryIO, Iterator, Self
+
+# Constants
+
+# Pass Header: archive type, pass information and the first sector number
+ARCHIVE_SINGLE_FILE = 0xFA
+ARCHIVE_MULTI_FILE = 0xF9
+PASS_HEADER_FORMAT = struct.Struct('<BBH')
+SECTOR_NUMBER_FORMAT = struct.Struct('<H')
+LAST_PASS_FLAG = 0x80
+DENSITY_SHIFT = 5
+DENSITY_MASK = 0x03
+
+# Geometry for each density code: (sector size, sector count)
+DENSITY_GEOMETRIES = {0: (128, 720), 1: (256, 720), 2: (128, 1040)}
+BOOT_SECTOR_COUNT = 3
+BOOT_SECTOR_SIZE = 128
+
+# Record Types; a set high bit means the next record is for the following
+# sector, otherwise its sector number follows the record.
+RECORD_MODIFY_BEGIN = 0x41
+RECORD_DOS_SECTOR = 0x42
+RECORD_COMPRESSED = 0x43
+RECORD_MODIFY_END = 0x44
+RECORD_END_OF_PASS = 0x45
+RECORD_SAME_AS_PREVIOUS = 0x46
+RECORD_UNCOMPRESSED = 0x47
+RECORD_TYPE_MASK = 0x7F
+SEQUENTIAL_FLAG = 0x80
+
+# DOS sector records hold the last five bytes of the sector; the rest of the
+# sector is filled with the first of them.
+DOS_SECTOR_TAIL_SIZE = 5
+
+# Compressed record offsets of zero, after the start of a sector, mean the
+# end of a 256-byte sector.
+FULL_SECTOR_OFFSET = 256
+
+# Error Messages
+NOT_DCM_FILE = 'Not a DCM file; unknown archive type'
+MULTI_FILE_UNSUPPORTED = 'Multi-file DCM archives are not supported'
+UNKNOWN_DENSITY = 'Unknown DCM density'
+UNKNOWN_RECORD_TYPE = 'Unknown DCM record type'
+INVALID_SECTOR_DATA = 'Invalid DCM sector data for sector'
+TRUNCATED_FILE = 'DCM file is truncated'
+
+class DcmImage:
+    '''A DiskComm compressed disk image, decoded as a stream.
+
+    Only the first pass header is read when the image is opened (for its
+    geometry); sectors() then decodes the passes, one record at a time, so
+    only one sector is ever held in memory.
+    '''
+    def __init__(self: Self, file: BinaryIO):
+        self._file = file
+        self._pass_header = self._read_pass_header()
+        density = (self._pass_header[1] >> DENSITY_SHIFT) & DENSITY_MASK
+        if density not in DENSITY_GEOMETRIES:
+            raise ValueError(f'{UNKNOWN_DENSITY}: {density}')
+        self._sector_size, self._sector_count = DENSITY_GEOMETRIES[density]
+
+    @property
+    def sector_size(self: Self) -> int:
+        return self._sector_size
+
+    @property
+    def sector_count(self: Self) -> int:
+        return self._sector_count
+
+    def sectors(self: Self) -> Iterator[tuple]:
+        '''Yields (sector number, data) for each sector stored in the image,
+        in the order they're stored; sectors that aren't stored are empty.
+        The data is a view of the decoder's buffer, valid until the next
+        sector is requested.'''
+        buffer = bytearray(self._sector_size)
+        pass_header = self._pass_header
+        while True:
+            _, pass_info, sector_number = pass_header
+            while True:
+                record_type = self._read(1)[0]
+                if record_type == RECORD_END_OF_PASS:
+                    break
+                length = (BOOT_SECTOR_SIZE if sector_number <= BOOT_SECTOR_COUNT
+                          else self._sector_size)
+                self._decode_record(record_type & RECORD_TYPE_MASK, buffer,
+                                    length, sector_number)
+                with memoryview(buffer)[:length] as data:
+                    yield sector_number, data
+                if record_type & SEQUENTIAL_FLAG:
+                    sector_number += 1
+                else:
+                    sector_number = SECTOR_NUMBER_FORMAT.unpack(
+                        self._read(SECTOR_NUMBER_FORMAT.size))[0]
+
+            if pass_info & LAST_PASS_FLAG:
+                return
+            pass_header = self._read_pass_header()
+
+    def _decode_record(self: Self, record_type: int, buffer: bytearray,
+                       length: int, sector_number: int):
+        # Records other than "uncompressed" and "DOS sector" build on the
+        # previous sector's data, left in the buffer.
+        if record_type == RECORD_MODIFY_BEGIN:
+            end = self._read_offset(length, sector_number)
+            buffer[:end + 1] = self._read(end + 1)[::-1]
+        elif record_type == RECORD_DOS_SECTOR:
+            fill_length = length - DOS_SECTOR_TAIL_SIZE
+            buffer[fill_length:length] = self._read(DOS_SECTOR_TAIL_SIZE)
+            buffer[:fill_length] = bytes((buffer[fill_length],)) * fill_length
+        elif record_type == RECORD_COMPRESSED:
+            self._decode_compressed(buffer, length, sector_number)
+        elif record_type == RECORD_MODIFY_END:
+            start = self._read_offset(length, sector_number)
+            buffer[start:length] = self._read(length - start)
+        elif record_type == RECORD_UNCOMPRESSED:
+            buffer[:length] = self._read(length)
+        elif record_type != RECORD_SAME_AS_PREVIOUS:
+            raise ValueError(f'{UNKNOWN_RECORD_TYPE}: {record_type:#04x}')
+
+    def _decode_compressed(self: Self, buffer: bytearray, length: int,
+                           sector_number: int):
+        # Alternating runs of literal bytes and of a repeated byte, each
+        # given by the offset at which it ends.
+        position = 0
+        while position < length:
+            end = self._read_end_offset(position, length, sector_number)
+            buffer[position:end] = self._read(end - position)
+            position = end
+            if position == length:
+                break
+            end = self._read_end_offset(position, length, sector_number)
+            buffer[position:end] = self._read(1) * (end - position)
+            position = end
+
+    def _read_end_offset(self: Self, position: int, length: int,
+                         sector_number: int) -> int:
+        end = self._read(1)[0]
+        if end == 0 and position > 0:
+            end = FULL_SECTOR_OFFSET
+        if end < position or end > length:
+            raise ValueError(f'{INVALID_SECTOR_DATA} {sector_number}')
+        return end
+
+    def _read_offset(self: Self, length: int, sector_number: int) -> int:
+        offset = self._read(1)[0]
+        if offset >= length:
+            raise ValueError(f'{INVALID_SECTOR_DATA} {sector_number}')
+        return offset
+
+    def _read_pass_header(self: Self) -> tuple:
+        pass_header = PASS_HEADER_FORMAT.unpack(
+            self._read(PASS_HEADER_FORMAT.size))
+        if pass_header[0] == ARCHIVE_MULTI_FILE:
+            raise ValueError(MULTI_FILE_UNSUPPORTED)
+        if pass_header[0] != ARCHIVE_SINGLE_FILE:
+            raise ValueError(f'{NOT_DCM_FILE}: {pass_header[0]:#04x}')
+        return pass_header
+
+    def _read(self: Self, count: int) -> bytes:
+        data = self._file.read(count)
+        if len(data) != count:
+            raise ValueError(TRUNCATED_FILE)
+        return data
@@ -0,0 +1,417 @@
+#!python3
+
+# dos2.py - Atari DOS 2.x / MyDOS File System Functions
+#
+# Copyright(C) 2026, Ian Michael Dunmore
+#
+# License: https://github.com/idunmore/AtariTools/blob/master/LICENSE
+
+# Native Python Modules
+import os
+import struct
+from typing import Iterator, Self
+
+# Constants
+
+# Disk Layout
+VTOC_SECTOR = 360
+VTOC2_SECTOR = 1024
+DIRECTORY_SECTOR = 361
+DIRECTORY_SECTOR_COUNT = 8
+DIRECTORY_ENTRY_SIZE = 16
+DIRECTORY_ENTRIES_PER_SECTOR = 8
+MIN_SECTOR_COUNT = DIRECTORY_SECTOR + DIRECTORY_SECTOR_COUNT - 1
+
+# VTOC Layout
+VTOC_DOS_CODE = 0
+VTOC_TOTAL_SECTORS = 1
+VTOC_FREE_SECTORS = 3
+VTOC_BITMAP = 10
+VTOC2_FREE_SECTORS = 122
+VTOC2_FIRST_SECTOR = 48
+DOS2_BITMAP_SECTORS = 720
+DOS25_BITMAP_SECTORS = 1024
+DOS_25_TOTAL_SECTORS = 1010
+VTOC_WORD_FORMAT = struct.Struct('<H')
+
+# Directory Entry Layout: flags, sector count, start sector, name and
+# extension (both space padded).
+DIRECTORY_ENTRY_FORMAT = struct.Struct('<BHH8s3s')
+NAME_LENGTH = 8
+EXTENSION_LENGTH = 3
+NAME_ENCODING = 'latin-1'
+
+# Directory Entry Flags
+FLAG_NEVER_USED = 0x00
+FLAG_OPEN_OUTPUT = 0x01
+FLAG_DOS2 = 0x02
+FLAG_LONG_LINKS = 0x04
+FLAG_SUBDIRECTORY = 0x10
+FLAG_LOCKED = 0x20
+FLAG_IN_USE = 0x40
+FLAG_DELETED = 0x80
+
+# Data Sector Links (the last three bytes of each data sector): file number
+# and high bits of the next sector, low byte of the next sector, and the
+# number of data bytes used in the sector.
+LINK_SIZE = 3
+FILE_NUMBER_SHIFT = 2
+NEXT_SECTOR_HIGH_MASK = 0x03
+SD_BYTE_COUNT_MASK = 0x7F
+SD_SECTOR_SIZE = 128
+
+# DOS 2.0S / 2.0D Format: sectors 1-3 boot, 360 VTOC, 361-368 directory and
+# the rest (to 719) for files; DOS 2.0 can't address sector 720.
+DOS2_SECTOR_COUNT = 720
+DOS2_DOS_CODE = 2
+DOS2_TOTAL_SECTORS = 707
+FIRST_DATA_SECTOR = 4
+BOOT_SECTORS_SIZE = 3 * SD_SECTOR_SIZE
+MAX_FILES = DIRECTORY_SECTOR_COUNT * DIRECTORY_ENTRIES_PER_SECTOR
+FLAG_NEW_FILE = FLAG_IN_USE | FLAG_DOS2
+BITS_PER_BYTE = 8
+BITMAP_HIGH_BIT = 0x80
+
+# Boot sector fields, set when DOS.SYS is on the disk: the DOS.SYS flag and
+# its first sector.
+DOS_SYS_FILENAME = 'DOS.SYS'
+BOOT_DOS_SYS_FLAG = 0x0E
+BOOT_DOS_SYS_SECTOR = 0x0F
+
+# File Names: up to 8 letters or digits (starting with a letter) and an
+# extension of up to 3.
+FILENAME_CHARACTERS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+FILENAME_PREFIX = 'X'
+
+# Error Messages
+NOT_DOS2_DISK = 'Not a DOS 2.x / MyDOS disk (too few sectors)'
+INVALID_VTOC = 'Not a DOS 2.x / MyDOS disk (invalid VTOC)'
+FILE_NUMBER_MISMATCH = 'File number mismatch in sector link of'
+CIRCULAR_LINKS = 'Circular sector links in'
+TOO_MANY_FILES = 'Too many files for one directory'
+DISK_FULL = 'Not enough free sectors for the files'
+DUPLICATE_FILENAME = 'Duplicate file name'
+INVALID_BOOT_SECTORS = 'Boot sectors must be'
+
+class DirectoryEntry:
+    '''A DOS 2.x / MyDOS directory entry.'''
+    __slots__ = ('_index', '_flags', '_sector_count', '_start_sector',
+                 '_name', '_extension')
+
+    def __init__(self: Self, index: int, bytes: bytes):
+        (self._flags, self._sector_count, self._start_sector, name,
+         extension) = DIRECTORY_ENTRY_FORMAT.unpack_from(bytes)
+        self._index = index
+        self._name = name.decode(NAME_ENCODING).rstrip()
+        self._extension = extension.decode(NAME_ENCODING).rstrip()
+
+    @property
+    def index(self: Self) -> int:
+        '''Position in its directory; DOS 2.x uses this as the file number.'''
+        return self._index
+
+    @property
+    def flags(self: Self) -> int:
+        return self._flags
+
+    @property
+    def sector_count(self: Self) -> int:
+        return self._sector_count
+
+    @property
+    def start_sector(self: Self) -> int:
+        return self._start_sector
+
+    @property
+    def name(self: Self) -> str:
+        return self._name
+
+    @property
+    def extension(self: Self) -> str:
+        return self._extension
+
+    @property
+    def filename(self: Self) -> str:
+        '''NAME.EXT, or just NAME if there's no extension.'''
+        return (f'{self._name}.{self._extension}' if self._extension
+                else self._name)
+
+    @property
+    def is_in_use(self: Self) -> bool:
+        return ((self._flags & FLAG_IN_USE) != 0 and
+                (self._flags & FLAG_DELETED) == 0)
+
+    @property
+    def is_locked(self: Self) -> bool:
+        return (self._flags & FLAG_LOCKED) != 0
+
+    @property
+    def is_subdirectory(self: Self) -> bool:
+        return (self._flags & FLAG_SUBDIRECTORY) != 0
+
+    @property
+    def has_long_links(self: Self) -> bool:
+        '''MyDOS files whose links use all 16 bits for the next sector, with
+        no file number.'''
+        return (self._flags & FLAG_LONG_LINKS) != 0
+
+class Dos2FileSystem:
+    '''Read access to the DOS 2.x / MyDOS file system on a disk image.
+
+    The image may be any object with sector(number) (returning a view of the
+    sector's data), sector_size and sector_count; e.g. an atr.AtrImage.  Only
+    the sectors that are needed (VTOC, directory, file data) are read.
+    '''
+    def __init__(self: Self, image):
+        if image.sector_count < MIN_SECTOR_COUNT:
+            raise ValueError(NOT_DOS2_DISK)
+        self._image = image
+
+    @property
+    def dos_code(self: Self) -> int:
+        return self._image.sector(VTOC_SECTOR)[VTOC_DOS_CODE]
+
+    @property
+    def total_sectors(self: Self) -> int:
+        '''Sectors available for files, per the VTOC.'''
+        return self._vtoc_word(VTOC_SECTOR, VTOC_TOTAL_SECTORS)
+
+    @property
+    def free_sectors(self: Self) -> int:
+        '''Free sectors, per the VTOC (and DOS 2.5's second VTOC).'''
+        free = self._vtoc_word(VTOC_SECTOR, VTOC_FREE_SECTORS)
+        if self.is_dos25:
+            free += self._vtoc_word(VTOC2_SECTOR, VTOC2_FREE_SECTORS)
+        return free
+
+    @property
+    def is_dos25(self: Self) -> bool:
+        '''DOS 2.5 enhanced density disks have a second VTOC (sector 1024).'''
+        return (self._image.sector_size == SD_SECTOR_SIZE and
+                self._image.sector_count >= VTOC2_SECTOR and
+                self.total_sectors == DOS_25_TOTAL_SECTORS)
+
+    def entries(self: Self,
+                directory_sector: int = DIRECTORY_SECTOR) -> Iterator[
+                    DirectoryEntry]:
+        '''Yields every entry, including deleted ones, in the directory that
+        starts at directory_sector; stops at the first never-used entry.'''
+        for sector_index in range(DIRECTORY_SECTOR_COUNT):
+            with self._image.sector(directory_sector + sector_index) as sector:
+                for entry_index in range(DIRECTORY_ENTRIES_PER_SECTOR):
+                    offset = entry_index * DIRECTORY_ENTRY_SIZE
+                    if sector[offset] == FLAG_NEVER_USED:
+                        return
+                    yield DirectoryEntry(
+                        sector_index * DIRECTORY_ENTRIES_PER_SECTOR +
+                        entry_index,
+                        sector[offset:offset + DIRECTORY_ENTRY_SIZE])
+
+    def files(self: Self,
+              directory_sector: int = DIRECTORY_SECTOR) -> Iterator[
+                  DirectoryEntry]:
+        '''Yields the entries, in use, in a directory.'''
+        for entry in self.entries(directory_sector):
+            if entry.is_in_use:
+                yield entry
+
+    def walk(self: Self, directory_sector: int = DIRECTORY_SECTOR,
+             path: tuple = ()) -> Iterator[tuple]:
+        '''Yields (path, entry) for the files in use in a directory and,
+        recursively, in its MyDOS sub-directories; path is a tuple of the
+        enclosing sub-directory names.'''
+        visited = {directory_sector}
+        yield from self._walk(directory_sector, path, visited)
+
+    def _walk(self: Self, directory_sector: int, path: tuple,
+              visited: set) -> Iterator[tuple]:
+        # Collect the directory's entries first, so its sectors are released
+        # before descending into any sub-directories.
+        for entry in list(self.files(directory_sector)):
+            yield path, entry
+            if (entry.is_subdirectory and
+                entry.start_sector not in visited and
+                entry.start_sector + DIRECTORY_SECTOR_COUNT - 1 <=
+                self._image.sector_count):
+                visited.add(entry.start_sector)
+                yield from self._walk(entry.start_sector,
+                                      path + (entry.filename,), visited)
+
+    def file_data(self: Self, entry: DirectoryEntry) -> Iterator[memoryview]:
+        '''Yields the data of a file, a sector at a time, by following the
+        sector links; each view is released when the next one is requested.'''
+        sector_size = self._image.sector_size
+        link_offset = sector_size - LINK_SIZE
+        sector_number = entry.start_sector
+        remaining = self._image.sector_count
+        while sector_number != 0:
+            if remaining == 0:
+                raise ValueError(f'{CIRCULAR_LINKS} {entry.filename}')
+            remaining -= 1
+
+            with self._image.sector(sector_number) as sector:
+                high = sector[link_offset]
+                low = sector[link_offset + 1]
+                count = sector[link_offset + 2]
+                if entry.has_long_links:
+                    next_sector = (high << 8) | low
+                else:
+                    if high >> FILE_NUMBER_SHIFT != entry.index:
+                        raise ValueError(
+                            f'{FILE_NUMBER_MISMATCH} {entry.filename}: '
+                            f'sector {sector_number}')
+                    next_sector = ((high & NEXT_SECTOR_HIGH_MASK) << 8) | low
+                if sector_size == SD_SECTOR_SIZE:
+                    count &= SD_BYTE_COUNT_MASK
+                with sector[:min(count, link_offset)] as data:
+                    yield data
+            sector_number = next_sector
+
+    def highest_allocated_sector(self: Self) -> int:
+        '''Highest sector number the VTOC bitmap shows as in use; sectors
+        beyond those the file system can address count as unused.'''
+        if self.total_sectors == 0:
+            raise ValueError(INVALID_VTOC)
+
+        bitmap, count = self._bitmap()
+        count = min(count, self._image.sector_count + 1)
+        for number in range(count - 1, -1, -1):
+            if not (bitmap[number // BITS_PER_BYTE] &
+                    (BITMAP_HIGH_BIT >> (number % BITS_PER_BYTE))):
+                return number
+        return 0
+
+    def _bitmap(self: Self) -> tuple:
+        # Returns the free sector bitmap (bit set = free), from sector 0, and
+        # the number of sectors it describes.
+        if self.is_dos25:
+            # DOS 2.5's second VTOC has the bitmap from sector 48 onwards
+            bitmap = self._vtoc_bytes(VTOC_SECTOR, VTOC_BITMAP,
+                                      DOS2_BITMAP_SECTORS // BITS_PER_BYTE)
+            bitmap += self._vtoc_bytes(
+                VTOC2_SECTOR,
+                (DOS2_BITMAP_SECTORS - VTOC2_FIRST_SECTOR) // BITS_PER_BYTE,
+                (DOS25_BITMAP_SECTORS - DOS2_BITMAP_SECTORS) // BITS_PER_BYTE)
+            return bitmap, DOS25_BITMAP_SECTORS
+
+        if (self.total_sectors == DOS2_TOTAL_SECTORS and
+            self._image.sector_count <= DOS2_SECTOR_COUNT):
+            bitmap = self._vtoc_bytes(VTOC_SECTOR, VTOC_BITMAP,
+                                      DOS2_BITMAP_SECTORS // BITS_PER_BYTE)
+            return bitmap, DOS2_BITMAP_SECTORS
+
+        # MyDOS: larger bitmaps continue into the sectors below the VTOC
+        count = self._image.sector_count + 1
+        size = VTOC_BITMAP + -(-count // BITS_PER_BYTE)
+        sector_size = self._image.sector_size
+        vtoc = b''.join(self._vtoc_bytes(VTOC_SECTOR - index, 0, sector_size)
+                        for index in range(-(-size // sector_size)))
+        return vtoc[VTOC_BITMAP:size], count
+
+    def _vtoc_bytes(self: Self, sector: int, offset: int, count: int) -> bytes:
+        with self._image.sector(sector) as data:
+            return bytes(data[offset:offset + count])
+
+    def _vtoc_word(self: Self, sector: int, offset: int) -> int:
+        return VTOC_WORD_FORMAT.unpack_from(self._image.sector(sector),
+                                            offset)[0]
+
+def build_file_system(image, files: list, boot_sectors: bytes = None):
+    '''Writes a DOS 2.0 file system, holding files, to a blank (zeroed)
+    image of 720 single or double density sectors.
+
+    files is a list of (DOS file name, host path) pairs; the files are laid
+    out in order, each in consecutive sectors, in a single sequential pass.
+    boot_sectors (the 384 bytes of sectors 1-3, e.g. from a DOS 2.0 disk) are
+    optional; if they are given, and DOS.SYS is one of the files, they are
+    updated to boot it.  ValueError is raised, before anything is written, if
+    the files won't fit.
+    '''
+    if len(files) > MAX_FILES:
+        raise ValueError(f'{TOO_MANY_FILES}: {len(files)}')
+    if boot_sectors is not None and len(boot_sectors) != BOOT_SECTORS_SIZE:
+        raise ValueError(f'{INVALID_BOOT_SECTORS} {BOOT_SECTORS_SIZE} bytes, '
+                         f'got: {len(boot_sectors)}')
+    names = set()
+    for name, path in files:
+        if name in names:
+            raise ValueError(f'{DUPLICATE_FILENAME}: {name}')
+        names.add(name)
+
+    data_size = image.sector_size - LINK_SIZE
+    sizes = [max(1, -(-os.stat(path).st_size // data_size))
+             for name, path in files]
+    if sum(sizes) > DOS2_TOTAL_SECTORS:
+        raise ValueError(f'{DISK_FULL}: {sum(sizes)} needed, '
+                         f'{DOS2_TOTAL_SECTORS} available')
+
+    free = [number for number in range(FIRST_DATA_SECTOR, DOS2_SECTOR_COUNT)
+            if number < VTOC_SECTOR or number > MIN_SECTOR_COUNT]
+    position = 0
+    for index, ((name, path), sector_count) in enumerate(zip(files, sizes)):
+        sectors = free[position:position + sector_count]
+        position += sector_count
+        write_file_data(image, index, path, sectors)
+        write_directory_entry(image, index, name, sectors)
+        if name == DOS_SYS_FILENAME and boot_sectors is not None:
+            boot_sectors = bytearray(boot_sectors)
+            boot_sectors[BOOT_DOS_SYS_FLAG] = 1
+            VTOC_WORD_FORMAT.pack_into(boot_sectors, BOOT_DOS_SYS_SECTOR,
+                                       sectors[0])
+
+    write_vtoc(image, free[position:])
+    if boot_sectors is not None:
+        for number in range(1, BOOT_SECTORS_SIZE // SD_SECTOR_SIZE + 1):
+            offset = (number - 1) * SD_SECTOR_SIZE
+            with image.sector(number) as sector:
+                sector[:] = boot_sectors[offset:offset + SD_SECTOR_SIZE]
+
+def write_file_data(image, file_number: int, path: str, sectors: list):
+    '''Reads a host file directly into its (linked) data sectors.'''
+    link_offset = image.sector_size - LINK_SIZE
+    with open(path, 'rb') as file:
+        for index, number in enumerate(sectors):
+            next_sector = sectors[index + 1] if index + 1 < len(sectors) else 0
+            with image.sector(number) as sector:
+                with sector[:link_offset] as data:
+                    count = file.readinto(data)
+                sector[link_offset] = ((file_number << FILE_NUMBER_SHIFT) |
+                                       (next_sector >> 8))
+                sector[link_offset + 1] = next_sector & 0xFF
+                sector[link_offset + 2] = count
+
+def write_directory_entry(image, index: int, filename: str, sectors: list):
+    name, _, extension = filename.partition('.')
+    sector_number = DIRECTORY_SECTOR + index // DIRECTORY_ENTRIES_PER_SECTOR
+    offset = (index % DIRECTORY_ENTRIES_PER_SECTOR) * DIRECTORY_ENTRY_SIZE
+    with image.sector(sector_number) as sector:
+        DIRECTORY_ENTRY_FORMAT.pack_into(
+            sector, offset, FLAG_NEW_FILE, len(sectors), sectors[0],
+            name.ljust(NAME_LENGTH).encode(NAME_ENCODING),
+            extension.ljust(EXTENSION_LENGTH).encode(NAME_ENCODING))
+
+def write_vtoc(image, free: list):
+    '''Writes the VTOC: DOS code, sector counts and the free sector bitmap
+    (a set bit is a free sector).'''
+    with image.sector(VTOC_SECTOR) as sector:
+        sector[VTOC_DOS_CODE] = DOS2_DOS_CODE
+        VTOC_WORD_FORMAT.pack_into(sector, VTOC_TOTAL_SECTORS,
+                                   DOS2_TOTAL_SECTORS)
+        VTOC_WORD_FORMAT.pack_into(sector, VTOC_FREE_SECTORS, len(free))
+        for number in free:
+            sector[VTOC_BITMAP + number // BITS_PER_BYTE] |= (
+                BITMAP_HIGH_BIT >> (number % BITS_PER_BYTE))
+
+def get_dos_filename(host_name: str) -> str:
+    '''Maps a host file name to a DOS 8.3 name (NAME.EXT); characters DOS
+    doesn't allow are dropped, and names must start with a letter.'''
+    stem, _, extension = host_name.upper().rpartition('.')
+    if not stem:
+        stem, extension = extension, ''
+    name = ''.join(c for c in stem if c in FILENAME_CHARACTERS)
+    if not name or not name[0].isalpha():
+        name = FILENAME_PREFIX + name
+    extension = ''.join(c for c in extension if c in FILENAME_CHARACTERS)
+    name = name[:NAME_LENGTH]
+    extension = extension[:EXTENSION_LENGTH]
+    return f'{name}.{extension}' if extension else name
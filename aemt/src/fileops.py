@@ -0,0 +1,103 @@
+#!python3
+
+# fileops.py - Low-level File Operations, shared by the image utilities
+#
+# Copyright(C) 2026, Ian Michael Dunmore
+#
+# License: https://github.com/idunmore/AtariTools/blob/master/LICENSE
+
+# Native Python Modules
+import errno
+import os
+import pathlib
+
+# 3rd Party/External Modules
+import click
+
+# Constants
+
+# Error Messages
+ERROR_TEXT ='Error: '
+TARGET_EXISTS = 'Target exists; use -o/--overwrite to replace it'
+
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Copy methods, in order of preference
+COPY_FILE_RANGE = 0
+SENDFILE = 1
+READ_WRITE = 2
+
+# Errors that mean "this copy method isn't supported here"; e.g. copying
+# between file systems, or sendfile() to a non-socket on macOS.
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.ENOTSOCK,
+                      errno.EOPNOTSUPP, errno.ENOTSUP}
+
+def copy_range(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    '''Copies count bytes, starting at offset in the source file, to the
+    current position of the target file; returns the number of bytes copied
+    (fewer than count if the source ends first).
+
+    The copy is done in the kernel (copy_file_range, or sendfile) where the
+    platform supports it, so the data never passes through Python; otherwise
+    it falls back to chunked reads and writes.
+    '''
+    method = COPY_FILE_RANGE if hasattr(os, 'copy_file_range') else SENDFILE
+    position = offset
+    remaining = count
+    while remaining > 0:
+        size = min(remaining, COPY_CHUNK_SIZE)
+        try:
+            if method == COPY_FILE_RANGE:
+                copied = os.copy_file_range(source_fd, target_fd, size,
+                                            position)
+            elif method == SENDFILE:
+                copied = os.sendfile(target_fd, source_fd, position, size)
+            else:
+                copied = write_all(target_fd, os.pread(source_fd, size,
+                                                       position))
+        except OSError as error:
+            if method == READ_WRITE or error.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            # Fall back to the next method, and retry
+            method += 1
+            continue
+
+        if copied == 0:
+            break
+        position += copied
+        remaining -= copied
+
+    return count - remaining
+
+def write_all(fd: int, data: bytes) -> int:
+    '''Writes all of data to fd (os.write may write only part of it).'''
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+    return len(data)
+
+def create_file(file: str, overwrite: bool) -> int:
+    '''Opens file for writing, creating it; returns the file descriptor.
+
+    If overwrite is False, and the file already exists, FileExistsError is
+    raised (without a separate existence check).
+    '''
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if overwrite else os.O_EXCL)
+    return os.open(file, flags, 0o666)
+
+def copy_to_new_file(source_fd: int, target: pathlib.Path, prefix: bytes,
+                     offset: int, size: int, overwrite: bool) -> bool:
+    '''Creates target, containing prefix followed by size bytes copied (in
+    the kernel, where supported) from offset in the source.'''
+    try:
+        target_fd = create_file(target, overwrite)
+    except FileExistsError:
+        click.echo(f'{ERROR_TEXT}{target}: {TARGET_EXISTS}')
+        return False
+
+    try:
+        write_all(target_fd, prefix)
+        copy_range(source_fd, target_fd, offset, size)
+    finally:
+        os.close(target_fd)
+    return True